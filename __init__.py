@@ -1,8 +1,48 @@
-import bingapipy
+"""
 
+See the README.md for examples of how to use this module.
 
-bingapipy.__doc__ = """
+"""
+import sys
+from types import ModuleType
+
+# Nothing below gets imported until it's first touched, so `import bingapipy` costs next to nothing.
+# EX -- `from bingapipy import BingSearch` imports bingapipy.bingapipy (& requests) right then, not before.
+_SUBMODULES = frozenset((
+    'async_search', 'batch_search', 'benchmarks', 'bing_simulator', 'bingapipy', 'bingapipy_lite', 'caching',
+    'client_ip', 'coalescing', 'columnar', 'connection_pooling', 'dedup', 'errors_and_validations', 'instrumentation',
+    'json_decoding', 'key_pool', 'logs', 'multi_vertical', 'parse_pool', 'query_template', 'rate_limiting',
+    'result_store', 'retrying', 'sizing', 'url_decoding',
+))
+# public name --> submodule it lives in.
+_LAZY_ATTRS = {
+    'BingSearch': 'bingapipy',
+    'BingLite': 'bingapipy_lite',
+    'AsyncBingSearch': 'async_search',
+    'BatchSearch': 'batch_search',
+    'MultiVerticalSearch': 'multi_vertical',
+}
+
+
+class _LazyPackage(ModuleType):
+    """Stands in for this package in sys.modules & imports submodules on first attribute access."""
+
+    def __getattr__(self, name):
+        if name in _SUBMODULES:
+            __import__(self.__name__ + '.' + name)
+            return sys.modules[self.__name__ + '.' + name]
+        if name in _LAZY_ATTRS:
+            value = getattr(getattr(self, _LAZY_ATTRS[name]), name)
+            setattr(self, name, value)
+            return value
+        raise AttributeError('module {} has no attribute {}'.format(self.__name__, name))
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | _SUBMODULES | set(_LAZY_ATTRS))
 
-See the README.md for examples of how to use this module.
 
-"""
\ No newline at end of file
+_package = _LazyPackage(__name__, __doc__)
+_package.__dict__.update(dict((k, v) for k, v in globals().items() if k.startswith('__')))
+# hold on to the real module: python 2 wipes a module's globals once nothing references it.
+_package._module = sys.modules[__name__]
+sys.modules[__name__] = _package
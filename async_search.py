@@ -0,0 +1,87 @@
+from multiprocessing.pool import ThreadPool
+from threading import Lock
+
+from .bingapipy import BingSearch
+from .connection_pooling import SessionPool
+
+
+###############################################
+##                                           ##
+##    Shared executor & connection pool      ##
+##                                           ##
+###############################################
+_shared = {'executor': None, 'session': None}
+_shared_lock = Lock()
+
+
+def shared_executor(max_in_flight=100):
+    """Process-wide thread pool used by every AsyncBingSearch that isn't handed its own executor."""
+    with _shared_lock:
+        if _shared['executor'] is None:
+            _shared['executor'] = ThreadPool(max_in_flight)
+        return _shared['executor']
+
+
+def shared_session(max_in_flight=100):
+    """Process-wide SessionPool sized so every in-flight request can hold its own warm connection."""
+    with _shared_lock:
+        if _shared['session'] is None:
+            _shared['session'] = SessionPool(pool_maxsize=max_in_flight)
+        return _shared['session']
+
+
+###############################################
+##                                           ##
+##     Non-blocking wrapper for BingSearch   ##
+##                                           ##
+###############################################
+class AsyncBingSearch(object):
+    """
+    Non-blocking counterpart to BingSearch.
+
+    search_2_json(), search_2_packaged_json() & page() return immediately with an AsyncResult.
+    Call .get() on it to wait for the value, .ready() to poll, or pass callback= to be handed the value
+    as soon as it arrives. URL building & parsing are done by the wrapped BingSearch (self.searcher),
+    and every instance shares one thread pool & one SessionPool unless you give it your own,
+    so hundreds of queries can be in flight at once over the same warm connections.
+
+    Any other attribute (params, headers, queries_run, reset(), ...) is read straight off self.searcher.
+
+    :param max_in_flight: size of the shared thread pool/connection pool, if this is the first instance to create them.
+    :param executor: a multiprocessing.pool.ThreadPool to run requests on instead of the shared one.
+    :param kwargs: anything else BingSearch() accepts.
+    """
+
+    def __init__(self, api_key=None, query=None, executor=None, max_in_flight=100, **kwargs):
+        if kwargs.get('session') is None:
+            kwargs['session'] = shared_session(max_in_flight)
+        self.searcher = BingSearch(api_key, query, **kwargs)
+        self.executor = executor if executor is not None else shared_executor(max_in_flight)
+
+    def __getattr__(self, name):
+        # only called for attrs not found on AsyncBingSearch itself.
+        if name == 'searcher':
+            raise AttributeError(name)
+        return getattr(self.searcher, name)
+
+    def _submit(self, func, args=(), kwargs=None, callback=None):
+        return self.executor.apply_async(func, args, kwargs or {}, callback=callback)
+
+    def search_2_json(self, return_html=False, params=None, callback=None):
+        return self._submit(self.searcher.search_2_json, kwargs=dict(return_html=return_html, params=params),
+                            callback=callback)
+
+    def search_2_packaged_json(self, params=None, callback=None):
+        return self._submit(self.searcher.search_2_packaged_json, kwargs=dict(params=params), callback=callback)
+
+    def page(self, count_or_range=None, return_type_function='links_plaintext', callback=None, **kwargs):
+        kwargs.update(count_or_range=count_or_range, return_type_function=return_type_function)
+        return self._submit(self.searcher.page, kwargs=kwargs, callback=callback)
+
+    def __repr__(self):
+        return 'AsyncBingSearch: {}'.format(self.searcher.query_plaintext)
+
+
+def gather(async_results, timeout=None):
+    """Waits on a list of AsyncResults & returns their values in the same order."""
+    return [async_result.get(timeout) for async_result in async_results]
@@ -0,0 +1,178 @@
+from multiprocessing.pool import ThreadPool
+from Queue import Queue
+from time import time
+
+
+###############################################
+##                                           ##
+##      Containers for batch bookkeeping     ##
+##                                           ##
+###############################################
+class BatchResult(object):
+    """
+    Outcome of one query in a batch.
+
+    BRi.query: the query string.
+    BRi.params: the per-query URL params passed in w/ it (or None).
+    BRi.results: whatever BingSearch.page() returned. None if the query failed.
+    BRi.error: the exception raised by the query. None if it succeeded.
+    BRi.requests: # of HTTP requests the query made.
+    BRi.elapsed: seconds from start to finish of this one query.
+    """
+
+    def __init__(self, query, params=None, results=None, error=None, requests=0, elapsed=0.0):
+        self.query = query
+        self.params = params
+        self.results = results
+        self.error = error
+        self.requests = requests
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return 'BatchResult: {} ({} results)'.format(self.query, len(self.results or []))
+        return 'BatchResult: {} (FAILED: {!r})'.format(self.query, self.error)
+
+
+class BatchStats(object):
+    """Running totals for one BatchSearch.run() call. Safe to read while the batch is still going."""
+
+    def __init__(self):
+        self.started = time()
+        self.finished = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.requests = 0
+        self.errors_by_type = {}
+
+    def _record(self, batch_result):
+        self.completed += 1
+        self.requests += batch_result.requests
+        if not batch_result.ok:
+            self.failed += 1
+            err_name = type(batch_result.error).__name__
+            self.errors_by_type[err_name] = self.errors_by_type.get(err_name, 0) + 1
+
+    @property
+    def elapsed(self):
+        return (self.finished or time()) - self.started
+
+    @property
+    def queries_per_second(self):
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def requests_per_second(self):
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self):
+        return float(self.failed) / self.completed if self.completed else 0.0
+
+    def as_dict(self):
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'requests': self.requests,
+            'elapsed': self.elapsed,
+            'queries_per_second': self.queries_per_second,
+            'requests_per_second': self.requests_per_second,
+            'errors_by_type': dict(self.errors_by_type),
+        }
+
+    def __repr__(self):
+        return 'BatchStats: {}/{} queries done, {} failed, {:.1f} q/s, {:.1f} req/s'.format(
+            self.completed, self.submitted, self.failed, self.queries_per_second, self.requests_per_second)
+
+
+###############################################
+##                                           ##
+##        Bulk runner for many queries       ##
+##                                           ##
+###############################################
+class BatchSearch(object):
+    """
+    Fans a big list of queries out across a pool of worker threads.
+
+    Every query runs on a BingSearch.for_query() copy of `searcher`, so they all share its headers,
+    SessionPool & RateLimiter, & nobody pays for reset(). Results stream back as BatchResult objects in
+    completion order (not input order) as soon as each query finishes. A query that raises is reported
+    w/ BatchResult.error set; the rest of the batch keeps going.
+
+    :param searcher: a configured BingSearch to use as the template for every query.
+    :param max_workers: number of queries to run at once.
+    :param max_pending: cap on queries submitted but not yet handed back. Keeps memory flat for huge inputs.
+    """
+
+    def __init__(self, searcher, max_workers=8, max_pending=None):
+        self.searcher = searcher
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        self.stats = BatchStats()
+
+    @staticmethod
+    def _split_item(item):
+        """Accepts either 'query string' or ('query string', {params})."""
+        if isinstance(item, basestring):
+            return item, None
+        query, params = item
+        return query, params
+
+    def _run_one(self, query, params, page_kwargs):
+        started = time()
+        searcher = None
+        try:
+            searcher = self.searcher.for_query(query, params)
+            results = searcher.page(**page_kwargs)
+            return BatchResult(query, params, results=results, requests=searcher.queries_run,
+                               elapsed=time() - started)
+        except Exception as err:
+            return BatchResult(query, params, error=err, requests=searcher.queries_run if searcher else 0,
+                               elapsed=time() - started)
+
+    def run(self, queries, count_or_range=None, return_type_function='links_plaintext', break_on_nth_page=100):
+        """
+        Generator. Runs every query in `queries` & yields a BatchResult for each as it completes.
+
+        :param queries: iterable of query strings or (query, params) pairs. Consumed lazily.
+        :param count_or_range, return_type_function, break_on_nth_page: passed to BingSearch.page() for every query.
+        :return: generator of BatchResult. self.stats holds the throughput & error counts for this run.
+        """
+        self.stats = stats = BatchStats()
+        page_kwargs = dict(count_or_range=count_or_range, return_type_function=return_type_function,
+                           break_on_nth_page=break_on_nth_page)
+        finished = Queue()
+        pool = ThreadPool(self.max_workers)
+        in_flight = 0
+        try:
+            for item in queries:
+                query, params = BatchSearch._split_item(item)
+                pool.apply_async(self._run_one, (query, params, page_kwargs), callback=finished.put)
+                stats.submitted += 1
+                in_flight += 1
+                while in_flight >= self.max_pending:
+                    batch_result = finished.get()
+                    in_flight -= 1
+                    stats._record(batch_result)
+                    yield batch_result
+            while in_flight:
+                batch_result = finished.get()
+                in_flight -= 1
+                stats._record(batch_result)
+                yield batch_result
+        finally:
+            stats.finished = time()
+            pool.terminate()
+
+    def run_all(self, queries, **page_kwargs):
+        """Non-streaming convenience: runs the whole batch & returns a list of BatchResult."""
+        return list(self.run(queries, **page_kwargs))
+
+    def __repr__(self):
+        return 'BatchSearch(max_workers={}): {}'.format(self.max_workers, self.stats)
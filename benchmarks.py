@@ -0,0 +1,477 @@
+"""
+Benchmarks for bingapipy. None of these touch the real network: the request-level ones run against a
+local bing_simulator.BingSimulator.
+
+Run w/:  python -m bingapipy.benchmarks [--only NAME ...] [--save results.json] [--baseline old_results.json]
+"""
+import argparse
+import gc
+from multiprocessing import cpu_count
+import json
+import os
+import platform
+import subprocess
+import sys
+from time import time
+from urllib import unquote
+
+from .bing_simulator import BingSimulator, fake_news_entry, fake_news_payload, fake_web_entry, fake_web_payload
+from .bingapipy import BingSearch, NewsResult, SlimNewsResult, SlimWebResult, WebResult
+from .bingapipy_lite import BingLite
+from .columnar import ResultBatch
+from .json_decoding import JsonDecoder, available_backends
+from .parse_pool import ParsePool, _entries_and_estimate
+from .query_template import QueryTemplate
+from .sizing import deep_sizeof
+from .url_decoding import _decode_one, _memo, decode_response_urls
+
+
+###############################################
+##                                           ##
+##          Measuring helpers                ##
+##                                           ##
+###############################################
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[int(round(q * (len(ordered) - 1)))] if ordered else None
+
+
+def _cpu_seconds():
+    """user + system CPU time of this process so far."""
+    try:
+        import resource
+    except ImportError:
+        # no resource module on Windows. os.times() is coarser, but it's there.
+        times = os.times()
+        return times[0] + times[1]
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class _Quiet(object):
+    """Swallows stdout, so the searchers' chatter doesn't end up in the timings or the tables."""
+
+    def write(self, text):
+        pass
+
+    def __enter__(self):
+        self._stdout, sys.stdout = sys.stdout, self
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.stdout = self._stdout
+
+
+def _print_table(title, rows):
+    print('\n' + title)
+    for row in rows:
+        print('    {:<32} {}'.format(row[0], '  '.join(str(col) for col in row[1:])))
+
+
+###############################################
+##                                           ##
+##                 Benchmarks                ##
+##                                           ##
+###############################################
+def bench_result_classes(n=100000, verbose=True):
+    """
+    Construction time & retained memory of n result objects, for WebResult/NewsResult vs. their Slim versions.
+    Memory is everything still reachable from the list of results, i.e. what stays alive once the
+    parsed payload itself has been dropped. url_decoded is read once on every object, so the lazy
+    decode in the Slim classes is paid for too.
+    """
+    web_entries = [fake_web_entry(i) for i in range(n)]
+    news_entries = [fake_news_entry(i) for i in range(n)]
+    contenders = (
+        ('WebResult', lambda: [WebResult(entry) for entry in web_entries]),
+        ('SlimWebResult', lambda: [SlimWebResult(entry) for entry in web_entries]),
+        ('SlimWebResult(keep_json=True)', lambda: [SlimWebResult(entry, True) for entry in web_entries]),
+        ('NewsResult', lambda: [NewsResult(entry) for entry in news_entries]),
+        ('SlimNewsResult', lambda: [SlimNewsResult(entry) for entry in news_entries]),
+    )
+    report = {}
+    for name, build in contenders:
+        # every class starts from a cold url-decoding memo.
+        _memo.clear()
+        # like timeit, keep the cyclic GC from landing its pauses on whichever class happens to be running.
+        gc.collect()
+        gc.disable()
+        started = time()
+        results = build()
+        construction = time() - started
+        gc.enable()
+        started = time()
+        for single_result in results:
+            single_result.url_decoded
+        decode = time() - started
+        report[name] = {
+            'construct_seconds': construction,
+            'construct_us_per_result': construction / n * 1e6,
+            'decode_seconds': decode,
+            'retained_mb': deep_sizeof(results) / 1048576.0,
+        }
+        del results
+    if verbose:
+        _print_table('Result classes, {} results each:'.format(n),
+                     [(name, '{:7.3f}s construct'.format(r['construct_seconds']),
+                       '{:7.3f}s url_decoded'.format(r['decode_seconds']),
+                       '{:8.1f}MB retained'.format(r['retained_mb']))
+                      for name, r in sorted(report.items())])
+    return report
+
+
+def bench_json_decoding(pages=500, verbose=True):
+    """
+    Per-page decode time of typical 50-result web & news bodies, for every JSON backend installed.
+    'full' is JsonDecoder.loads(); 'urls only' is JsonDecoder.extract(body, ('url',)), i.e. loads() plus the trim.
+    """
+    bodies = (
+        ('web', json.dumps(fake_web_payload(50))),
+        ('news', json.dumps(fake_news_payload(50))),
+    )
+    report = {}
+    for backend in available_backends():
+        decoder = JsonDecoder(backend)
+        for payload_name, body in bodies:
+            for mode, decode in (('full', decoder.loads), ('urls only', lambda b: decoder.extract(b, ('url',)))):
+                started = time()
+                for _ in xrange(pages):
+                    decode(body)
+                report['{} {} {}'.format(backend, payload_name, mode)] = {
+                    'us_per_page': (time() - started) / pages * 1e6,
+                    'body_kb': len(body) / 1024.0,
+                }
+    if verbose:
+        _print_table('JSON decoding, {} pages of 50 results each:'.format(pages),
+                     [(name, '{:9.1f}us/page'.format(r['us_per_page']), '{:6.1f}KB body'.format(r['body_kb']))
+                      for name, r in sorted(report.items())])
+    return report
+
+
+def _legacy_decode_response_url(bing_encoded_url):
+    """The old fixed-offset decoder, kept here only to compare against."""
+    ans = unquote(bing_encoded_url[153:-15].lstrip('=')).decode('utf8')
+    if ans == bing_encoded_url[153:-15].lstrip('='):
+        ans = ans.replace('%3a', ':').replace('%2f', '/').replace('%3f', '?').replace('%3d', '=')
+    return ans
+
+
+def bench_url_decoding(pages=2000, verbose=True):
+    """
+    Decoding every url of `pages` 50-result pages, where 1 url in 4 was already seen on an earlier page
+    (the same sites keep coming back across pages & queries).
+    """
+    urls = [fake_web_entry(i - i % 4 * (i // 4 % 2))[u'url'] for i in xrange(pages * 50)]
+    page_list = [urls[i:i + 50] for i in xrange(0, len(urls), 50)]
+    contenders = (
+        ('legacy, per url', lambda: [[_legacy_decode_response_url(url) for url in page] for page in page_list]),
+        ('r= param, per url, no memo', lambda: [[_decode_one(url) for url in page] for page in page_list]),
+        ('decode_response_urls(page)', lambda: [decode_response_urls(page) for page in page_list]),
+    )
+    report = {}
+    for name, decode in contenders:
+        _memo.clear()
+        started = time()
+        decode()
+        report[name] = {'us_per_page': (time() - started) / pages * 1e6}
+    if verbose:
+        _print_table('URL decoding, {} pages of 50 urls each:'.format(pages),
+                     [(name, '{:8.1f}us/page'.format(r['us_per_page'])) for name, r in sorted(report.items())])
+    return report
+
+
+def bench_parse_pool(pages=400, verbose=True):
+    """
+    Pages/sec turning raw 50-result web bodies into SlimWebResults (url_decoded filled in) or ResultBatches,
+    in this process vs. on a ParsePool of 1, 2 & one-per-core workers. The pool only pulls ahead w/ >1 core.
+    CPU/page is this process's alone, i.e. what's left holding the GIL.
+    """
+    bodies = [(json.dumps(fake_web_payload(50, offset=page_num * 50)), page_num * 50) for page_num in xrange(pages)]
+    decoder = JsonDecoder()
+
+    def in_process(output):
+        def parse_all():
+            for body, first_rank in bodies:
+                json_entries = _entries_and_estimate(decoder.loads(body))[0]
+                if output == 'columnar':
+                    ResultBatch.from_json_entries(json_entries, first_rank=first_rank)
+                else:
+                    slim = [SlimWebResult(entry) for entry in json_entries]
+                    decode_response_urls([r.url for r in slim])
+        return parse_all
+
+    report = {}
+    for output in ('slim', 'columnar'):
+        contenders = [('in process, {}'.format(output), None)]
+        for processes in sorted(set((1, 2, cpu_count()))):
+            contenders.append(('ParsePool({}), {}'.format(processes, output), processes))
+        for name, processes in contenders:
+            _memo.clear()
+            if processes is None:
+                cpu_started, started = _cpu_seconds(), time()
+                in_process(output)()
+            else:
+                with ParsePool(processes) as pool:
+                    pool.map(bodies[:processes], output)
+                    cpu_started, started = _cpu_seconds(), time()
+                    pool.map(bodies, output)
+            report[name] = {'pages_per_second': pages / (time() - started),
+                            'cpu_ms_per_page': (_cpu_seconds() - cpu_started) / pages * 1000}
+    if verbose:
+        _print_table('Parsing {} pages of 50 web results, {} core(s):'.format(pages, cpu_count()),
+                     [(name, '{:8.1f} pages/s'.format(r['pages_per_second']),
+                       '{:6.3f}ms CPU/page'.format(r['cpu_ms_per_page'])) for name, r in sorted(report.items())])
+    return report
+
+
+def bench_query_prep(queries=5000, verbose=True):
+    """
+    Per-query cost of getting from a new query string to a prepared request, for reset(new_query=...),
+    for_query() & QueryTemplate. 'prep' is bingapipy's share; 'prepared' adds requests' PreparedRequest.
+    """
+    from requests import Request
+    key = '0' * 32
+    search_queries = ['seattle software engineer {}'.format(i) for i in xrange(queries)]
+    with _Quiet():
+        searcher = BingSearch(key, 'warm up', verbose=False)
+    template = QueryTemplate(key)
+    template_headers = template.headers
+
+    def via_reset(query):
+        searcher.reset(new_query=query, verbose=False)
+        return searcher.base_url + searcher._encoded_q, searcher._page_params(0, 50), searcher.headers
+
+    def via_for_query(query):
+        clone = searcher.for_query(query)
+        return clone.base_url + clone._encoded_q, clone._page_params(0, 50), clone.headers
+
+    def via_template(query):
+        return template.url(query, 0, 50), None, template_headers
+
+    def via_template_search(query):
+        bound = template.search(query, session=searcher.session)
+        return bound._request_target(bound._page_params(0, 50))[0], None, bound.headers
+
+    report = {}
+    for name, prep in (('reset(new_query=...)', via_reset), ('for_query()', via_for_query),
+                       ('QueryTemplate.url()', via_template), ('QueryTemplate.search()', via_template_search)):
+        with _Quiet():
+            started = time()
+            for query in search_queries:
+                prep(query)
+            prep_seconds = time() - started
+            started = time()
+            for query in search_queries:
+                url, params, headers = prep(query)
+                Request('GET', url, params=params, headers=headers).prepare()
+            prepared_seconds = time() - started
+        report[name] = {'prep_us': prep_seconds / queries * 1e6, 'prepared_us': prepared_seconds / queries * 1e6}
+    if verbose:
+        _print_table('Query prep, {} queries:'.format(queries),
+                     [(name, '{:7.1f}us prep'.format(r['prep_us']), '{:7.1f}us w/ PreparedRequest'.format(r['prepared_us']))
+                      for name, r in sorted(report.items())])
+    return report
+
+
+def _time_pages(fetch_pages):
+    """
+    Runs fetch_pages(), a generator yielding one list of results per page, & times each page.
+    :return: (per-page latencies, results, wall seconds, CPU seconds)
+    """
+    latencies = []
+    results = []
+    cpu_started = _cpu_seconds()
+    started = last = time()
+    with _Quiet():
+        for page_of_results in fetch_pages():
+            now = time()
+            latencies.append(now - last)
+            last = now
+            results.extend(page_of_results)
+    return latencies, results, time() - started, _cpu_seconds() - cpu_started
+
+
+def _search_report(latencies, results, wall, cpu):
+    # a ResultBatch holds a whole page of results.
+    result_count = sum(len(item) if isinstance(item, ResultBatch) else 1 for item in results)
+    return {
+        'queries_per_second': len(latencies) / wall,
+        'p50_ms': _percentile(latencies, 0.5) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'cpu_ms_per_page': cpu / len(latencies) * 1000,
+        'bytes_per_result': deep_sizeof(results) / float(result_count) if result_count else 0.0,
+    }
+
+
+def bench_search(queries=10, pages_per_query=5, latency=0.0, verbose=True):
+    """
+    Requests/sec, p50/p99 page latency, CPU per page & retained memory per result for BingSearch.page()'s
+    return types & for BingLite, all against a BingSimulator running in its own process (so its CPU isn't counted).
+    :param latency: seconds the simulator adds to every response.
+    """
+    key = '0' * 32
+    simulator = BingSimulator(latency=latency).start(in_subprocess=True)
+    endpoints = simulator.api_endpoints
+    search_queries = ['seattle engineer {}'.format(i) for i in xrange(queries)]
+    count = pages_per_query * 50
+
+    def bing_search_pages(return_type_function, **kwargs):
+        def fetch_pages():
+            for query in search_queries:
+                searcher = BingSearch(key, query, verbose=False, api_endpoints=endpoints, **kwargs)
+                for page_of_results in searcher.iter_pages(count, return_type_function, prefetch=False):
+                    yield page_of_results
+        return fetch_pages
+
+    def bing_search_concurrent():
+        # one "page" per query here, since all of its pages go out at once.
+        for query in search_queries:
+            searcher = BingSearch(key, query, verbose=False, api_endpoints=endpoints)
+            yield searcher.page(count, 'json_packaged', concurrent=True)
+
+    def bing_lite_pages():
+        for query in search_queries:
+            searcher = BingLite(key, query, verbose=False, api_endpoints=endpoints)
+            for page_num in xrange(pages_per_query):
+                searcher.params.update({'count': '50', 'offset': str(page_num * 50)})
+                yield searcher.search_2_packaged_json()
+
+    contenders = (
+        ('BingSearch links_plaintext', bing_search_pages('links_plaintext')),
+        ('BingSearch json_packaged', bing_search_pages('json_packaged')),
+        ('BingSearch json_packaged slim', bing_search_pages('json_packaged', slim_results=True)),
+        ('BingSearch columnar', bing_search_pages('columnar')),
+        ('BingSearch concurrent (per query)', bing_search_concurrent),
+        ('BingLite json_packaged', bing_lite_pages),
+    )
+    report = {}
+    try:
+        # warm-up, so the first contender isn't charged for the simulator's cold start.
+        with _Quiet():
+            BingSearch(key, 'warm up', verbose=False, api_endpoints=endpoints).page(100)
+        for name, fetch_pages in contenders:
+            report[name] = _search_report(*_time_pages(fetch_pages))
+    finally:
+        simulator.stop()
+    if verbose:
+        _print_table('Searching a local simulator, {} queries x {} pages, {}ms latency:'.format(
+            queries, pages_per_query, latency * 1000),
+            [(name, '{:7.1f} req/s'.format(r['queries_per_second']), 'p50 {:6.1f}ms'.format(r['p50_ms']),
+              'p99 {:6.1f}ms'.format(r['p99_ms']), '{:6.2f}ms CPU/page'.format(r['cpu_ms_per_page']),
+              '{:7.0f}B/result'.format(r['bytes_per_result']))
+             for name, r in sorted(report.items())])
+    return report
+
+
+# each one runs in a fresh interpreter w/ the package's parent dir on sys.path. Prints seconds & modules loaded.
+_COLD_IMPORT_SCRIPT = '''
+import sys, time
+started, modules = time.time(), len(sys.modules)
+{}
+print('%r %d' % (time.time() - started, len(sys.modules) - modules))
+'''
+_COLD_IMPORTS = (
+    ('import bingapipy', 'import bingapipy'),
+    ('from bingapipy import BingSearch', 'from bingapipy import BingSearch'),
+    ('from bingapipy import BingLite', 'from bingapipy import BingLite'),
+    ('import bingapipy.dedup', 'import bingapipy.dedup'),
+    ('first BingSearch()', "from bingapipy import BingSearch; BingSearch('0' * 32, 'q', verbose=False)"),
+)
+
+
+def bench_import_time(runs=7, verbose=True):
+    """
+    Cold-start cost, for spawning lots of short-lived workers: median wall time & number of modules loaded
+    by each statement in _COLD_IMPORTS, in a brand new interpreter every run.
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    package_name = os.path.basename(package_dir)
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(package_dir), PYTHONDONTWRITEBYTECODE='1')
+    report = {}
+    for name, statement in _COLD_IMPORTS:
+        script = _COLD_IMPORT_SCRIPT.format(statement.replace('bingapipy', package_name, 1))
+        timings = []
+        for _ in xrange(runs):
+            output = subprocess.check_output([sys.executable, '-c', script], env=environment)
+            seconds, modules = output.split()[-2:]
+            timings.append(float(seconds))
+        report[name] = {'import_ms': _percentile(timings, 0.5) * 1000, 'modules_loaded': int(modules)}
+    if verbose:
+        _print_table('Cold imports, median of {} fresh interpreters:'.format(runs),
+                     [(name, '{:7.2f}ms'.format(r['import_ms']), '{:4d} modules'.format(r['modules_loaded']))
+                      for name, r in [(name, report[name]) for name, _ in _COLD_IMPORTS]])
+    return report
+
+
+BENCHMARKS = {
+    'import_time': bench_import_time,
+    'result_classes': bench_result_classes,
+    'json_decoding': bench_json_decoding,
+    'url_decoding': bench_url_decoding,
+    'parse_pool': bench_parse_pool,
+    'query_prep': bench_query_prep,
+    'search': bench_search,
+}
+
+
+def run_all(verbose=True, only=None):
+    return dict((name, bench(verbose=verbose)) for name, bench in sorted(BENCHMARKS.items())
+                if only is None or name in only)
+
+
+###############################################
+##                                           ##
+##       Saving & comparing to a baseline    ##
+##                                           ##
+###############################################
+def save_results(report, path):
+    with open(path, 'w') as results_file:
+        json.dump({'python': platform.python_version(), 'platform': platform.platform(), 'saved': time(),
+                   'results': report}, results_file, indent=2, sort_keys=True)
+
+
+def _flatten(report):
+    """{bench: {contender: {metric: value}}} --> {(bench, contender, metric): value}"""
+    return dict(((bench, contender, metric), value)
+                for bench, contenders in report.items()
+                for contender, metrics in contenders.items()
+                for metric, value in metrics.items())
+
+
+def compare_to_baseline(report, baseline_path, tolerance=0.10, verbose=True):
+    """
+    Flags every number that got worse by more than `tolerance` (0.10 == 10%) vs. a file saved by save_results().
+    Rates (*_per_second) are worse when lower; everything else is worse when higher.
+    :return: list of (bench, contender, metric, baseline value, new value) for every regression.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = _flatten(json.load(baseline_file)['results'])
+    regressions = []
+    for name, new_value in sorted(_flatten(report).items()):
+        old_value = baseline.get(name)
+        if not old_value or new_value is None:
+            continue
+        change = (new_value - old_value) / float(old_value)
+        if name[2].endswith('per_second'):
+            change = -change
+        if change > tolerance:
+            regressions.append(name + (old_value, new_value))
+    if verbose:
+        _print_table('Regressions vs. {} (> {:.0%} worse):'.format(baseline_path, tolerance),
+                     [(' / '.join(regression[:3]), '{:.4g} --> {:.4g}'.format(*regression[3:]))
+                      for regression in regressions] or [('none',)])
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='bingapipy benchmarks')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='run just these')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved earlier w/ --save')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='slow-down allowed before flagging, 0.10 == 10%%')
+    args = parser.parse_args()
+    results = run_all(only=args.only)
+    if args.save:
+        save_results(results, args.save)
+    if args.baseline:
+        sys.exit(1 if compare_to_baseline(results, args.baseline, args.tolerance) else 0)
@@ -0,0 +1,347 @@
+"""
+A local stand-in for the Bing v5 endpoints in static_constants.API_ENDPOINTS, for benchmarks & offline tinkering.
+
+EX --
+    >>> with BingSimulator(latency=0.05, rate_429=0.01) as bing:
+    ...     searcher = BingSearch('0' * 32, 'seattle engineer', api_endpoints=bing.api_endpoints)
+    ...     searcher.page(500)
+"""
+import json
+import random
+import socket
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from multiprocessing import Process, Queue
+from SocketServer import ThreadingMixIn
+from urllib import quote
+from urlparse import parse_qs, urlsplit
+
+
+###############################################
+##                                           ##
+##      Synthetic, realistically-sized       ##
+##              Bing payloads                ##
+##                                           ##
+###############################################
+def _bing_redirect(target):
+    return (u'https://www.bing.com/cr?IG=5D1C4A1D6F8B4C2E9A7E3F1B2C3D4E5F&CID=0A1B2C3D4E5F60718293A4B5C6D7E8F9'
+            u'&rd=1&h=abcdefghijklmnopqrstuvwxyz0123456789ABCDEFG&v=1&r=' + quote(target, safe='') +
+            u'&p=DevEx,5065.1')
+
+
+def fake_web_entry(i, snippet_length=None):
+    target = 'http://www.example{}.com/careers/software-engineer-{}?utm_source=bing&ref={}'.format(i % 997, i, i * 7)
+    snippet = (u'Example {} Corp is hiring software engineers in Seattle, WA. Browse open roles, salaries, '
+               u'benefits & interview tips from people who work here.'.format(i))
+    if snippet_length is not None:
+        snippet = (snippet * (snippet_length // len(snippet) + 1))[:snippet_length]
+    return {
+        u'id': u'https://api.cognitive.microsoft.com/api/v5/#WebPages.{}'.format(i % 50),
+        u'name': u'Software Engineer Careers in Seattle - Example {} Corp'.format(i),
+        u'url': _bing_redirect(target),
+        u'about': [{u'name': u'Example {} Corp'.format(i)}],
+        u'displayUrl': u'www.example{}.com/careers/software-engineer-{}'.format(i % 997, i),
+        u'snippet': snippet,
+        u'deepLinks': [{u'name': u'Jobs', u'url': u'https://www.bing.com/cr?r=http%3a%2f%2fexample.com%2fjobs'}],
+        u'dateLastCrawled': u'2017-02-{:02d}T12:34:56'.format(i % 28 + 1),
+    }
+
+
+def fake_news_entry(i, snippet_length=None):
+    description = (u'Employers in the Seattle area added jobs again last month, led by software & cloud '
+                   u'companies, according to figures released on Friday. Story {}.'.format(i))
+    if snippet_length is not None:
+        description = (description * (snippet_length // len(description) + 1))[:snippet_length]
+    return {
+        u'name': u'Seattle tech hiring picks up for the {}th straight month'.format(i),
+        u'url': _bing_redirect('http://www.news{}.com/business/seattle-tech-{}.html'.format(i % 97, i)),
+        u'image': {u'thumbnail': {u'contentUrl': u'https://www.bing.com/th?id=ON.{:032X}&pid=News'.format(i),
+                                  u'width': 700, u'height': 466}},
+        u'description': description,
+        u'about': [{u'readLink': u'https://api.cognitive.microsoft.com/api/v5/entities/{}'.format(i),
+                    u'name': u'Seattle'}],
+        u'provider': [{u'_type': u'Organization', u'name': u'News Outlet {}'.format(i % 13)}],
+        u'datePublished': u'2017-02-{:02d}T08:00:00'.format(i % 28 + 1),
+        u'category': u'Business',
+    }
+
+
+def fake_image_entry(i, snippet_length=None):
+    return {
+        u'name': u'Seattle skyline at dusk {}'.format(i),
+        u'webSearchUrl': u'https://www.bing.com/images/search?view=detailv2&id={:040X}'.format(i),
+        u'thumbnailUrl': u'https://tse1.mm.bing.net/th?id=OIP.{:032X}&pid=Api'.format(i),
+        u'datePublished': u'2017-02-{:02d}T08:00:00'.format(i % 28 + 1),
+        u'contentUrl': _bing_redirect('http://www.photos{}.com/seattle/{}.jpg'.format(i % 89, i)),
+        u'hostPageUrl': _bing_redirect('http://www.photos{}.com/seattle/{}.html'.format(i % 89, i)),
+        u'contentSize': u'{} B'.format(150000 + i),
+        u'encodingFormat': u'jpeg',
+        u'hostPageDisplayUrl': u'www.photos{}.com/seattle/{}.html'.format(i % 89, i),
+        u'width': 1600,
+        u'height': 1067,
+        u'thumbnail': {u'width': 300, u'height': 200},
+    }
+
+
+def fake_video_entry(i, snippet_length=None):
+    return {
+        u'name': u'A day in the life of a Seattle software engineer, part {}'.format(i),
+        u'description': u'What working at Example {} Corp is actually like.'.format(i),
+        u'webSearchUrl': u'https://www.bing.com/videos/search?q=seattle+engineer&view=detail&mid={:040X}'.format(i),
+        u'thumbnailUrl': u'https://tse2.mm.bing.net/th?id=OVP.{:032X}&pid=Api'.format(i),
+        u'datePublished': u'2017-02-{:02d}T08:00:00'.format(i % 28 + 1),
+        u'publisher': [{u'name': u'YouTube'}],
+        u'contentUrl': u'https://www.youtube.com/watch?v={:011d}'.format(i),
+        u'hostPageUrl': _bing_redirect('https://www.youtube.com/watch?v={:011d}'.format(i)),
+        u'encodingFormat': u'h264',
+        u'duration': u'PT{}M{}S'.format(i % 20 + 1, i % 60),
+        u'viewCount': 1000 + i * 37,
+        u'width': 1280,
+        u'height': 720,
+    }
+
+
+def fake_web_payload(n=50, offset=0, total_estimated_matches=123000, snippet_length=None):
+    return {
+        u'_type': u'SearchResponse',
+        u'webPages': {
+            u'webSearchUrl': u'https://www.bing.com/search?q=seattle+engineer',
+            u'totalEstimatedMatches': total_estimated_matches,
+            u'value': [fake_web_entry(offset + i, snippet_length) for i in range(n)],
+        },
+        u'rankingResponse': {u'mainline': {u'items': [{u'answerType': u'WebPages', u'resultIndex': i}
+                                                      for i in range(n)]}},
+    }
+
+
+def fake_news_payload(n=50, offset=0, total_estimated_matches=4200, snippet_length=None):
+    return {
+        u'_type': u'News',
+        u'totalEstimatedMatches': total_estimated_matches,
+        u'value': [fake_news_entry(offset + i, snippet_length) for i in range(n)],
+    }
+
+
+def fake_images_payload(n=50, offset=0, total_estimated_matches=9800, snippet_length=None):
+    return {
+        u'_type': u'Images',
+        u'totalEstimatedMatches': total_estimated_matches,
+        u'nextOffsetAddCount': 0,
+        u'value': [fake_image_entry(offset + i) for i in range(n)],
+    }
+
+
+def fake_videos_payload(n=50, offset=0, total_estimated_matches=1300, snippet_length=None):
+    return {
+        u'_type': u'Videos',
+        u'totalEstimatedMatches': total_estimated_matches,
+        u'value': [fake_video_entry(offset + i) for i in range(n)],
+    }
+
+
+# endpoint name (see static_constants.API_ENDPOINTS) --> payload builder. Anything not listed gets web results.
+_PAYLOADS_BY_ENDPOINT = {
+    'web': fake_web_payload,
+    'news': fake_news_payload,
+    'news_categories': fake_news_payload,
+    'news_trending': fake_news_payload,
+    'images': fake_images_payload,
+    'images_trending': fake_images_payload,
+    'videos': fake_videos_payload,
+    'videos_trending': fake_videos_payload,
+    'videos_details': fake_videos_payload,
+}
+
+
+###############################################
+##                                           ##
+##             The mock server               ##
+##                                           ##
+###############################################
+class _SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # buffered, so headers & body leave in one write instead of one packet per header.
+    wbufsize = -1
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # otherwise Nagle + the client's delayed ACKs add ~40ms to any response spanning more than one write.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.connections_lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self):
+        with self.server.connections_lock:
+            self.server.connections.discard(self.connection)
+        BaseHTTPRequestHandler.finish(self)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        simulator = self.server.simulator
+        path, query = urlsplit(self.path)[2:4]
+        # 'news/trendingtopics&' endpoints glue the query straight onto the path.
+        path, _, path_query = path.partition('&')
+        params = dict((k, v[-1]) for k, v in parse_qs(query or path_query).items())
+        delay = simulator.latency + random.uniform(0, simulator.jitter)
+        if delay:
+            time.sleep(delay)
+        endpoint = simulator.endpoints_by_path.get(path)
+        if endpoint is None:
+            status, body, extra_headers = 404, {'errors': [{'message': 'no such endpoint'}]}, {}
+        elif not self.headers.get('Ocp-Apim-Subscription-Key'):
+            status, body, extra_headers = 401, {'errors': [{'message': 'missing subscription key'}]}, {}
+        elif self.headers['Ocp-Apim-Subscription-Key'] in simulator.key_statuses:
+            status = simulator.key_statuses[self.headers['Ocp-Apim-Subscription-Key']]
+            body, extra_headers = {'errors': [{'message': 'simulated {} for this key'.format(status)}]}, {}
+        elif simulator.rate_429 and random.random() < simulator.rate_429:
+            status, body, extra_headers = 429, {'errors': [{'message': 'rate limit is exceeded'}]}, {'Retry-After': '0'}
+        else:
+            offset = int(params.get('offset', 0))
+            count = min(int(params.get('count', 10)), 50)
+            available = max(min(count, simulator.total_estimated_matches - offset), 0)
+            body = _PAYLOADS_BY_ENDPOINT.get(endpoint, fake_web_payload)(
+                available, offset, simulator.total_estimated_matches, simulator.snippet_length)
+            status, extra_headers = 200, {}
+        simulator._count(endpoint, status)
+        payload = json.dumps(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, *args, **kwargs):
+        HTTPServer.__init__(self, *args, **kwargs)
+        # open keep-alive connections, so stop() can hang up on them & their handler threads can exit.
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    def close_connections(self, timeout=1.0):
+        """Hangs up on every open connection & gives their handler threads up to `timeout` seconds to finish."""
+        with self.connections_lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        deadline = time.time() + timeout
+        while self.connections and time.time() < deadline:
+            time.sleep(0.005)
+
+    def handle_error(self, request, client_address):
+        # clients hanging up on keep-alive connections isn't worth a traceback.
+        pass
+
+
+class BingSimulator(object):
+    """
+    Threaded local HTTP server answering every path in static_constants.API_ENDPOINTS w/ realistic payloads.
+
+    Honors offset & count (w/ Bing's cap of 50), runs out at total_estimated_matches, & wants a subscription
+    key header like the real thing. Point BingSearch/BingLite at it w/ api_endpoints=simulator.api_endpoints.
+
+    :param latency: seconds added to every response.
+    :param jitter: up to this many more seconds, picked at random per response.
+    :param rate_429: share (0-1) of requests answered w/ a 429.
+    :param total_estimated_matches: results each query "has".
+    :param snippet_length: chars of snippet/description per result, to grow or shrink payloads. None for the usual.
+    :param key_statuses: dict of subscription key --> status every request w/ that key gets, EX -- {key: 403}.
+    :param port: 0 picks a free one.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, total_estimated_matches=123000, snippet_length=None,
+                 key_statuses=None, host='127.0.0.1', port=0):
+        from .bingapipy import static_constants
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.total_estimated_matches = total_estimated_matches
+        self.snippet_length = snippet_length
+        self.key_statuses = key_statuses or {}
+        self.host = host
+        self.port = port
+        self.endpoints_by_path = dict((urlsplit(url).path.partition('&')[0], name)
+                                      for name, url in static_constants.API_ENDPOINTS.items())
+        self._real_endpoints = static_constants.API_ENDPOINTS
+        self._server = None
+        self._process = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.requests_by_status = {}
+        self.requests_by_endpoint = {}
+
+    def _count(self, endpoint, status):
+        with self._lock:
+            self.requests += 1
+            self.requests_by_status[status] = self.requests_by_status.get(status, 0) + 1
+            self.requests_by_endpoint[endpoint] = self.requests_by_endpoint.get(endpoint, 0) + 1
+
+    @property
+    def api_endpoints(self):
+        """A copy of static_constants.API_ENDPOINTS pointing at this simulator."""
+        return dict((name, url.replace('https://api.cognitive.microsoft.com', 'http://{}:{}'.format(self.host, self.port)))
+                    for name, url in self._real_endpoints.items())
+
+    def start(self, in_subprocess=False):
+        """
+        Starts serving in the background.
+        :param in_subprocess: serve from a separate process, so the server's CPU isn't counted against the caller.
+                              Request counters aren't available that way.
+        """
+        if in_subprocess:
+            port_queue = Queue()
+            self._process = Process(target=self._serve_in_subprocess, args=(port_queue,))
+            self._process.daemon = True
+            self._process.start()
+            self.port = port_queue.get(timeout=10)
+            return self
+        self._server = _ThreadedHTTPServer((self.host, self.port), _SimulatorHandler)
+        self._server.simulator = self
+        self.port = self._server.server_address[1]
+        serving_thread = threading.Thread(target=self._server.serve_forever)
+        serving_thread.daemon = True
+        serving_thread.start()
+        return self
+
+    def _serve_in_subprocess(self, port_queue):
+        self._server = _ThreadedHTTPServer((self.host, self.port), _SimulatorHandler)
+        self._server.simulator = self
+        port_queue.put(self._server.server_address[1])
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server.close_connections()
+            self._server = None
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def stats(self):
+        return {'requests': self.requests, 'by_status': dict(self.requests_by_status),
+                'by_endpoint': dict(self.requests_by_endpoint)}
+
+    def __enter__(self):
+        if self._server is None and self._process is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __repr__(self):
+        return 'BingSimulator on {}:{}: {}'.format(self.host, self.port, self.stats())
@@ -1,10 +1,23 @@
-from collections import OrderedDict, Iterable
-from socket import gethostbyname, gethostname
-from time import sleep
+from collections import OrderedDict, Iterable, deque
+import logging
+from threading import Lock, local
+from time import time
+from urllib import quote_plus
 import requests
 from requests.models import urlencode
 
+# caching, columnar, instrumentation, rate_limiting & multiprocessing only get imported where they're used,
+# so importing this module stays cheap for short-lived workers.
+from .client_ip import AUTO, resolve_client_ip
+from .connection_pooling import SessionPool
 from .errors_and_validations import JsonParsingError, QueryChecker
+from .json_decoding import default_decoder
+from .logs import redact_headers
+from .retrying import RetryPolicy
+from .url_decoding import decode_response_url, decode_response_urls
+
+# messages are only built when they'll be emitted, & verbose=False instances skip the INFO ones altogether.
+log = logging.getLogger(__name__)
 
 
 ###############################################
@@ -22,7 +35,7 @@ class default_user_params():
     ###############################################
     ##HEADER_PARAMS['Ocp-Apim-Subscription-Key'] = None                                                               # <--('Ocp-Apim-Subscription-Key' SHOULD NOT BE SET HERE. YOU MUST PASS IT TO THE SEARCH-OBJECT-CONSTRUCTOR CLASS: BingSearch)
     DEFAULT_HEADER_PARAMS['User-Agent'] = "Mozilla/5.0 (Windows NT 6.2; Win64; x64; rv:16.0.1) Gecko/20121011 Firefox/16.0.1" # <--(dummy User-Agent header for consistent response-format)
-    DEFAULT_HEADER_PARAMS['X-Search-ClientIP'] = gethostbyname(gethostname())                                                 # <--(these are methods from the 'socket' module which produce the host-machine's public IP)
+    DEFAULT_HEADER_PARAMS['X-Search-ClientIP'] = AUTO                                                                        # <--(looked up lazily & cached, see client_ip.client_ip(). Set to None to leave it out)
     DEFAULT_HEADER_PARAMS['X-MSEdge-ClientID'] = None
     DEFAULT_HEADER_PARAMS['Accept'] = None
     DEFAULT_HEADER_PARAMS['Accept-Language'] = None
@@ -45,6 +58,31 @@ class default_user_params():
     # News Search Only!
     DEFAULT_URL_PARAMS['category'] = None         # <--(ONLY FOR NEWS SEARCH. See available categories by mkt)
 
+###############################################
+##                                           ##
+##   What the page just fetched looked like  ##
+##                                           ##
+###############################################
+class _PageState(local):
+    """
+    # of results Bing sent for the page just fetched, the share of them that were new to the dedup index &
+    its totalEstimatedMatches. Every thread sees its own, so pages fetched side by side can't overwrite
+    each other's. Paging hands snapshot()s back w/ the pages & whoever consumes them restore()s them in order.
+    """
+    size = None
+    new_share = None
+    estimate = None
+
+    def clear(self):
+        self.size = self.new_share = self.estimate = None
+
+    def snapshot(self):
+        return {'size': self.size, 'new_share': self.new_share, 'estimate': self.estimate}
+
+    def restore(self, snapshot):
+        self.size, self.new_share, self.estimate = snapshot['size'], snapshot['new_share'], snapshot['estimate']
+
+
 ###############################################
 ##                                           ##
 ##      Primary API for SearchWebLite        ##
@@ -55,44 +93,103 @@ class BingSearch(object):
      Don't be intimidated because I write spaghetti code.
      Read the docstrings. They're attached to the most important methods.
      """
+    # instrumentation.NOT_INSTRUMENTED, looked up by the first uninstrumented call so importing this module
+    # doesn't import instrumentation.
+    _not_instrumented = None
 
     ###############################################
     ## Initialization functions and attr-setting ##
     ###############################################
     def __init__(self, api_key=None, query=None, endpoint='web', verbose=True, validate_params=False,
                  params=default_user_params.DEFAULT_URL_PARAMS.copy(),
-                 headers=default_user_params.DEFAULT_HEADER_PARAMS.copy()):
+                 headers=default_user_params.DEFAULT_HEADER_PARAMS.copy(), session=None, rate_limiter=None,
+                 retry_policy=None, cache=None, result_store=None, offline=False, slim_results=False, keep_json=False,
+                 json_decoder=None, dedup=None, instrumentation=None, api_endpoints=None, parse_pool=None,
+                 key_pool=None, single_flight=None, template=None, history_size=1000):
 
+        # optional key_pool.ApiKeyPool. When set, every request picks its subscription key from it & api_key
+        # may be left out.
+        self.key_pool = key_pool
+        if api_key is None and key_pool is not None:
+            api_key = key_pool.keys[0]
         assert isinstance(api_key, str) and len(api_key) == 32
         self._key = api_key
         assert isinstance(query, str)
         self.query_plaintext = query
+        # set by query_template.QueryTemplate.search(). Its params & headers (key included) are used as-is.
+        self.template = template
+        if template is not None:
+            params, headers = template.params, template.headers
         assert isinstance(params, dict) and isinstance(headers, dict)
         self.params = params
         self.headers = headers
         assert endpoint in static_constants.API_ENDPOINTS.keys()
         self.endpoint_type = endpoint
+        # endpoint name --> URL. Defaults to Bing's; pass bing_simulator.BingSimulator().api_endpoints to test locally.
+        self.api_endpoints = api_endpoints if api_endpoints is not None else static_constants.API_ENDPOINTS
         self._verbose = verbose
+        # pass a shared SessionPool to re-use warm connections across instances.
+        self.session = session if session is not None else SessionPool()
+        # optional rate_limiting.RateLimiter. Share one (see shared_rate_limiter()) to pace every instance together.
+        self.rate_limiter = rate_limiter
+        # decides how 429s/5xx/dropped connections get retried. Share one to share its retry-budget.
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        # optional caching.MemoryCache/DiskCache sitting between search_2_response_obj & the network.
+        self.cache = cache
+        # optional result_store.ResultStore. Every JSON page fetched gets written to it, & it's read back
+        # when the network is down. offline=True reads from it exclusively & never sends a request, so
+        # search_2_response_obj(), 'full_response' & return_html=True raise LookupError (barring a self.cache hit).
+        self.result_store = result_store
+        self.offline = offline
+        # slim_results=True packages into the __slots__-based SlimWebResult/SlimNewsResult, which drop
+        # the source JSON unless keep_json=True.
+        self.slim_results = slim_results
+        self.keep_json = keep_json
+        # json_decoding.JsonDecoder; defaults to the fastest JSON library installed.
+        self.json_decoder = json_decoder if json_decoder is not None else default_decoder()
+        # optional dedup.DedupIndex. Results it's already seen are dropped before they get packaged.
+        self.dedup = dedup
+        # optional instrumentation.Instrumentation. Gets a RequestRecord of where the time went for every call.
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            from .instrumentation import instrument_session
+            instrument_session(self.session)
+        # optional parse_pool.ParsePool. When set, 'json_packaged' & 'columnar' pages are decoded & packaged on
+        # its worker processes; 'json_packaged' then comes back as SlimWebResult/SlimNewsResult.
+        self.parse_pool = parse_pool
+        # optional coalescing.SingleFlight. Identical requests already in flight are waited on, not re-sent.
+        self.single_flight = single_flight
+        # what the last page fetched on each thread looked like. Read it through last_page_size & co.
+        self._page = _PageState()
+        # filled in by every paging run. See page().
+        self.paging_report = None
         # making sure these exisssst....
         self.queries_run = 0
+        # paging threads all count their requests into queries_run.
+        self._queries_run_lock = Lock()
         self.total_estimated_matches = 0
-        self._url_comparisons = []
-        self.urls_predicted = ''
+        # how many predicted urls & (predicted, actual) url pairs are kept around. None keeps all of them.
+        self.history_size = history_size
+        self._url_comparisons = deque(maxlen=history_size)
+        self._predicted_urls = deque(maxlen=history_size)
         # Ok now do stuff:
-        self._init_constructor_funcs(validate_params=validate_params)
+        if template is None:
+            self._init_constructor_funcs(validate_params=validate_params)
+        else:
+            self._init_from_template()
 
 
     def _init_constructor_funcs(self, rewrite=False, skip_cleaning_headers_and_params=False, validate_params=False):
-        self.base_url = static_constants.API_ENDPOINTS[self.endpoint_type]
+        self.base_url = self.api_endpoints[self.endpoint_type]
         # encode your query to be URL-rdy
         if 'categories' not in self.endpoint_type:
-            self._encoded_q = urlencode(dict(q=self.query_plaintext))
+            self._encoded_q = _encode_query(self.query_plaintext)
         else:
             self._encoded_q = self._handle_categorical_query()
         # clean out them' dictionary attrs.
         if skip_cleaning_headers_and_params == True: pass
         else:
-            self.headers = _clear_null_vals(self.headers)
+            self.headers = resolve_client_ip(_clear_null_vals(self.headers))
             self.params = _clear_null_vals(self.params)
         # (>_<) no. Bad monkey.
         # TODO: Make paging-support less hacky.
@@ -102,29 +199,51 @@ class BingSearch(object):
             if self._key != self.headers['Ocp-Apim-Subscription-Key']:
                 self.headers = self._inject_key_into_header(self.headers, override=True)
             elif self._verbose:
-                print 'INFO: API key equals previous. Header-injection skipped'
+                log.info('API key equals previous. Header-injection skipped')
                 pass
             else: pass
-            self.urls_predicted += '\n' + self._predict_url()
+            self._predict_url()
         else:
             self.headers = self._inject_key_into_header(self.headers)
-            self.urls_predicted += '\n' + self._predict_url(bypass_setting_attrs=True)
+            self._predict_url()
         if validate_params:
             QueryChecker.check_web_params(self.params, self.headers)
-        if self._verbose:
-            print 'The search-interface has been initialized w/ the following params:\n\nEndpoint-Type: {}\n\nQuery-URL: {}\n\nHeader-Dict: {}'.format(self.endpoint_type, self.urls_predicted, self.headers)
+        # its args cost more to build than the rest of a reset, so check the level before building them.
+        if self._verbose and log.isEnabledFor(logging.INFO):
+            log.info('The search-interface has been initialized w/ the following params:\n\nEndpoint-Type: %s\n\nQuery-URL: %s\n\nHeader-Dict: %s', self.endpoint_type, self.urls_predicted, redact_headers(self.headers))
+
+    def _init_from_template(self):
+        """_init_constructor_funcs() for instances made by a QueryTemplate, which already cleaned & keyed everything."""
+        self.base_url = self.template.base_url
+        self._encoded_q = _encode_query(self.query_plaintext)
 
     ###############################################
     ##   _methods used BEFORE request is sent    ##
     ###############################################
 
-    def _predict_url(self, bypass_setting_attrs=False):
+    def _predict_url(self, bypass_setting_attrs=False, params=None):
         """Can be used before or after dictionaries have been cleaned of NoneTypes"""
-        prediction = self.base_url + self._encoded_q + '&' + urlencode(self.params)
+        prediction = self.base_url + self._encoded_q + '&' + urlencode(self.params if params is None else params)
         if not bypass_setting_attrs:
-            self.urls_predicted = prediction
+            self._predicted_urls.append(prediction)
         return prediction
 
+    @property
+    def urls_predicted(self):
+        """Every url predicted at init & reset, newest last, one per line. Only the last `history_size` are kept."""
+        return ''.join('\n' + url for url in self._predicted_urls)
+
+    @urls_predicted.setter
+    def urls_predicted(self, value):
+        self._predicted_urls.clear()
+        self._predicted_urls.extend(url for url in value.split('\n') if url)
+
+    def _request_target(self, params):
+        """(url, params) for session.get(). Instances made by a QueryTemplate send the URL it pre-encoded."""
+        if self.template is not None and self.template.covers(params):
+            return self.template.url(self.query_plaintext, params.get('offset'), params.get('count')), None
+        return self.base_url + self._encoded_q, params
+
     def _handle_categorical_query(self):
         """Essentially just a validation method. categorical search must be used in conjunction w/ the mkt param"""
         # Must specify mkt param to do categorical searches. Only two working are for GB and US.
@@ -143,7 +262,7 @@ class BingSearch(object):
         if 'Ocp-Apim-Subscription-Key' in header_dictionary.keys():
             if override:
                 if verbose is True:
-                    print 'API key in supplied dictionary will be replaced.'
+                    log.info('API key in supplied dictionary will be replaced.')
                 del header_dictionary['Ocp-Apim-Subscription-Key']
             else:
                 raise IndexError('API key detected in dictionary arg. Please set override=True to replace it')
@@ -159,27 +278,128 @@ class BingSearch(object):
     # Notice that each search_2_... method starts by calling the previous.
     # requests is a magical black-box that handles all the actual HTTP(S).
 
-    def search_2_response_obj(self):
+    def search_2_response_obj(self, params=None):
         """
         Use requests to call the query.
-        As of now, this interface only sends individual GET requests & does not set keep-alive or use cookies.
+        Requests go through self.session, so keep-alive connections are re-used between calls.
+        If self.cache is set, a fresh cached response for the same URL & headers is returned w/o hitting the network.
+        :param params: URL params to send instead of self.params. Lets paging threads vary offset/count w/o touching state.
         :return: requests.Response()
         """
+        with self._request_record() as record:
+            if params is None:
+                params = self.params
+            if self.cache is not None:
+                from .caching import response_cache_key
+                cache_key = response_cache_key(self._predict_url(bypass_setting_attrs=True, params=params), self.headers)
+                cached_response = self.cache.get(cache_key)
+                if cached_response is not None:
+                    if record is not None:
+                        record.cache_hit = True
+                    return cached_response
+            if self.offline:
+                # only _fetch_content() knows how to answer from self.result_store; everything else needs the network.
+                raise LookupError('offline=True: no HTTP requests are sent. Only search_2_json() & the return types '
+                                  'built on it can be answered, from self.result_store.')
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if record is not None:
+                record.start_attempt()
+                sent = time()
+            try:
+                ##############################
+                #           BEHOLD!          #
+                if self.key_pool is None:
+                    url, request_params = self._request_target(params)
+                    response_object = self.session.get(url, params=request_params, headers=self.headers)
+                else:
+                    response_object = self._send_w_pooled_key(params)
+                ##############################
+                if record is not None:
+                    record.note_response(response_object, time() - sent)
+                self.last_actual_url = response_object.url
+                if self._verbose:
+                    self._url_comparisons.append((self._predict_url(bypass_setting_attrs=True, params=params),
+                                                  self.last_actual_url))
+                with self._queries_run_lock:
+                    self.queries_run += 1
+                if self.cache is not None and response_object.status_code == 200:
+                    self.cache.set(cache_key, response_object)
+                return response_object
+            except requests.Timeout:
+                log.warning('request timed out. Aborting search.')
+                raise Warning('Request timed out')
+
+    def _send_w_pooled_key(self, params):
+        """
+        search_2_response_obj()'s request, sent w/ a key from self.key_pool. A key answering 429/403 gets
+        benched by the pool & the request goes straight back out on another one, trying each key at most once.
+        """
+        url, request_params = self._request_target(params)
+        for _ in xrange(len(self.key_pool)):
+            key = self.key_pool.acquire()
+            headers = self.headers.copy()
+            headers['Ocp-Apim-Subscription-Key'] = key
+            try:
+                response_object = self.session.get(url, params=request_params, headers=headers)
+            except Exception:
+                self.key_pool.release(key)
+                raise
+            self.key_pool.release(key, response_object.status_code, RetryPolicy.retry_after(response_object))
+            if response_object.status_code not in (403, 429):
+                break
+        return response_object
+
+    def _search_2_content(self, return_html=False, params=None):
+        """
+        Everything search_2_json() does except decoding: offline replay, retries, error-codes & storing.
+        When self.single_flight is set, a caller asking for a page already being fetched gets that fetch's body.
+        :return: the raw response body, or the html text if return_html.
+        """
+        if self.single_flight is None:
+            return self._fetch_content(return_html, params)
+        from .caching import response_cache_key
+        flight_key = (response_cache_key(self._predict_url(bypass_setting_attrs=True, params=params), self.headers),
+                      return_html)
+        content, coalesced = self.single_flight.do(flight_key, lambda: self._fetch_content(return_html, params))
+        if coalesced and self.instrumentation is not None:
+            from .instrumentation import current_record
+            record = current_record()
+            if record is not None:
+                record.coalesced = True
+        return content
+
+    def _fetch_content(self, return_html=False, params=None):
+        """_search_2_content() minus the coalescing."""
+        store_key = None
+        if self.result_store is not None and not return_html:
+            store_key = self.result_store.page_key(self.query_plaintext, self.params if params is None else params,
+                                                   self.endpoint_type)
+            if self.offline:
+                if store_key not in self.result_store:
+                    raise LookupError('offline=True but no stored page for {}'.format(store_key))
+                return self.result_store.get_bytes(store_key)
         try:
-            ##############################
-            #           BEHOLD!          #
-            response_object = requests.get(self.base_url + self._encoded_q, params=self.params, headers=self.headers)
-            ##############################
-            self.last_actual_url = response_object.url
-            if self._verbose:
-                self._url_comparisons.append((self._predict_url(), self.last_actual_url))
-            self.queries_run += 1
-            return response_object
-        except requests.Timeout:
-            print('request timed out. Aborting search.')
-            raise Warning('Request timed out')
+            response_object = self.retry_policy.execute(lambda: self.search_2_response_obj(params=params))
+        except requests.ConnectionError:
+            # offline replay: fall back on the stored copy of this page if there is one.
+            if store_key is not None and store_key in self.result_store:
+                return self.result_store.get_bytes(store_key)
+            raise
+        # Handle error-codes and Warn about potential garbage results if query URL is too long.
+        if len(response_object.url) > 1300:
+            log.warning('URL too long at %s characters.\n Bing can silently truncate your query.\n Limit URLs to < 1,200 chars.', len(response_object.url))
+        response_validated = validate_request_response(response_object)
+        if response_validated == '429':
+            raise IOError(static_constants._ERROR_CODES['429'])
+        if return_html:
+            return response_object.text
+        if store_key is not None:
+            # skipped when the store already holds these bytes, EX -- a repeat query answered from self.cache.
+            self.result_store.append(store_key, response_object.content)
+        return response_object.content
 
-    def search_2_json(self, return_html=False):
+    def search_2_json(self, return_html=False, params=None):
         """
         Each subsequent function in the BingSearch.search_2_....() family acts on the output from the one above it.
 
@@ -188,27 +408,112 @@ class BingSearch(object):
 
         :param return_html [BOOL] : set to true to get html returned instead of JSON.
                 WebResult won't be able to package html, so don't try it.
+        :param params: optional URL params overriding self.params for this one call.
         :return:
                 a messy nested dictionary of JSON containing <= 50 results
                 or a giant html string, depending on your URL params & return_html flag.
         """
-        response_object = self.search_2_response_obj()
-        # Handle error-codes and Warn about potential garbage results if query URL is too long.
-        if len(response_object.url) > 1300:
-            print('WARNING: URL too long at {} characters.\n Bing can silently truncate your query.\n Limit URLs to < 1,200 chars.').format(len(response_object.url))
-        response_validated = validate_request_response(response_object)
-        if response_validated == '429':
-            response_object = self._handle_429_error(url=response_object.url)
-        else:
-            pass
-        if return_html:
-            return response_object.text()
-        return response_object.json()
+        with self._request_record() as record:
+            content = self._search_2_content(return_html=return_html, params=params)
+            if return_html:
+                return content
+            if record is None:
+                return self.json_decoder.loads(content)
+            started = time()
+            json_response = self.json_decoder.loads(content)
+            record.add('decode', time() - started)
+            record.bytes = len(content)
+            return json_response
+
+    def search_2_fields(self, fields=('url',), params=None):
+        """
+        Like search_2_json(), but only the listed fields of each result are kept. Decoding costs the same as
+        search_2_json(); the saving is in packaging & memory, since nothing else survives the call.
 
-    def search_2_packaged_json(self):
+        :param fields: JSON field names to keep, EX -- ('url', 'name').
+        :param params: optional URL params overriding self.params for this one call.
+        :return: list of dicts holding just `fields`, one per result.
+        """
+        with self._request_record() as record:
+            content = self._search_2_content(params=params)
+            started = time()
+            # image & video entries keep their link in 'contentUrl'. It's handed back as 'url'.
+            borrow_content_url = 'url' in fields and 'contentUrl' not in fields
+            trimmed = self.json_decoder.extract(content, tuple(fields) + ('contentUrl',) if borrow_content_url else fields)
+            if record is not None:
+                record.add('decode', time() - started)
+                record.bytes = len(content)
+            if trimmed is not None and borrow_content_url:
+                media = trimmed['_type'] in MEDIA_RESULT_CLASSES
+                for entry in trimmed['value']:
+                    content_url = entry.pop('contentUrl')
+                    if media:
+                        entry['url'] = content_url
+            return self._trimmed_entries(trimmed, content, fields)
+
+    def _trimmed_entries(self, trimmed, content, fields):
+        """search_2_fields() from JsonDecoder.extract() on."""
+        if trimmed is None:
+            # not a shape extract() knows. Decode the lot & let _parse_json sort it out.
+            packaged = self._parse_json(self.json_decoder.loads(content))
+            if not isinstance(packaged, list):
+                # no results; _parse_json handed back the JSON itself (or None).
+                return []
+            return [dict((field, getattr(i, field, None)) for field in fields) for i in packaged]
+        if trimmed['totalEstimatedMatches'] is not None:
+            self._note_total_estimated_matches(trimmed['totalEstimatedMatches'])
+        return self._page_entries(trimmed['value'])
+
+    def search_2_packaged_json(self, params=None):
         """returns list of WebResult objects w/ len(list) == # of links returned"""
-        raw_json = self.search_2_json()
-        return self._parse_json(raw_json)
+        with self._request_record() as record:
+            raw_json = self.search_2_json(params=params)
+            if record is None:
+                return self._parse_json(raw_json)
+            started = time()
+            packaged_json = self._parse_json(raw_json)
+            record.add('parse', time() - started)
+            return packaged_json
+
+    def _request_record(self):
+        """
+        Context manager wrapped around each search_2_* call. Yields the instrumentation.RequestRecord
+        for this call (nested calls share their caller's), or None when self.instrumentation isn't set.
+        """
+        if self.instrumentation is None:
+            not_instrumented = BingSearch._not_instrumented
+            if not_instrumented is None:
+                from .instrumentation import NOT_INSTRUMENTED
+                not_instrumented = BingSearch._not_instrumented = NOT_INSTRUMENTED
+            return not_instrumented
+        return self.instrumentation.request(self.query_plaintext)
+
+    def search_2_pooled(self, output='slim', params=None):
+        """
+        search_2_packaged_json() w/ the decoding & packaging done on self.parse_pool's worker processes.
+        Only the raw bytes go out & only compact results come back, so it scales past the GIL.
+
+        :param output: 'slim' for a list of SlimWebResult/SlimNewsResult, 'columnar' for a columnar.ResultBatch.
+        :param params: optional URL params overriding self.params for this one call.
+        """
+        with self._request_record() as record:
+            content = self._search_2_content(params=params)
+            first_rank = int((self.params if params is None else params).get('offset', 0))
+            started = time()
+            parsed = self.parse_pool.parse(content, output, first_rank=first_rank, keep_json=self.keep_json)
+            if record is not None:
+                record.add('parse', time() - started)
+                record.bytes = len(content)
+            if parsed is None:
+                # not a web or news page. Parse it here, the usual way.
+                json_response = self.json_decoder.loads(content)
+                if output == 'columnar':
+                    return self._result_batch(json_response, first_rank)
+                return self._parse_json(json_response)
+            results, page_size, total_estimated_matches = parsed
+            if total_estimated_matches is not None:
+                self._note_total_estimated_matches(total_estimated_matches)
+            return self._page_results(results, page_size)
 
     def search_2_html(self):
         if 'textFormat' in self.params.keys() and self.params['textFormat'].upper() == 'HTML':
@@ -236,25 +541,29 @@ class BingSearch(object):
 
         # Catch and handle error-responses
         if json_response['_type'] == 'News':
-            return [NewsResult(single_json_entry) for single_json_entry in json_response['value']]
+            if 'totalEstimatedMatches' in json_response:
+                self._note_total_estimated_matches(json_response['totalEstimatedMatches'])
+            return self._package_entries(json_response['value'], news=True)
         elif json_response['_type'] == 'SearchResponse':
-            if not self.total_estimated_matches:
-                try:
-                    print(('Bing says there are an estimated {} results matching your query'.format(
-                        json_response['webPages']['totalEstimatedMatches'])))
-                    self.total_estimated_matches = int(json_response['webPages']['totalEstimatedMatches'])
+            try:
+                self._note_total_estimated_matches(json_response['webPages']['totalEstimatedMatches'])
 
-                #TODO: !!!!! MASSIVE ASSUMPTION BEING MADE THAT NO 'webPages' value during a web-search == no results
-                except KeyError:
-                    Warning('No results')
-                    return None
-            packaged_json = [WebResult(single_json_entry) for single_json_entry in json_response['webPages']['value']]
+            #TODO: !!!!! MASSIVE ASSUMPTION BEING MADE THAT NO 'webPages' value during a web-search == no results
+            except KeyError:
+                Warning('No results')
+                self._page.size = 0
+                return None
+            packaged_json = self._package_entries(json_response['webPages']['value'])
             return packaged_json
+        elif json_response['_type'] in MEDIA_RESULT_CLASSES:
+            if 'totalEstimatedMatches' in json_response:
+                self._note_total_estimated_matches(json_response['totalEstimatedMatches'])
+            return self._package_media_entries(json_response['value'], MEDIA_RESULT_CLASSES[json_response['_type']])
         elif 'webPages' not in json_response.keys():
             try:
                 if bool(json_response['rankingResponse']) is False:
                     if self._verbose:
-                        print('NO RESULTS RETURNED BY BING. RETURNING ORIGINAL JSON.')
+                        log.info('NO RESULTS RETURNED BY BING. RETURNING ORIGINAL JSON.')
                     else: pass
                     return json_response
             except KeyError:
@@ -263,9 +572,9 @@ class BingSearch(object):
             try:
                 link_list = json_response[self.params['responseFilter']]['value']
                 try:
-                    return [WebResult(single_json_entry) for single_json_entry in link_list]
+                    return self._package_entries(link_list)
                 except Exception:
-                    print('unrecognized response format.\n RETURNING LIST OF URLS, NOT WEBRESULT OBJECTS.')
+                    log.warning('unrecognized response format.\n RETURNING LIST OF URLS, NOT WEBRESULT OBJECTS.')
                     return [json_item['url'] for json_item in link_list]
             except KeyError:
                 try:
@@ -275,22 +584,75 @@ class BingSearch(object):
                     raise EnvironmentError('something is wrong with using responsefilter to id the json.\n aka I"m a bad coder')
         else: raise JsonParsingError('_parse_json in bingapipy did not parse correctly')
 
-    def _handle_429_error(self, url):
-        timeout_cnt = 0
-        while True:
-            if timeout_cnt < 5:
-                sleep(2)
-                r2 = requests.get(url, self.headers)
-                if validate_request_response(r2) == '429':
-                    timeout_cnt += 1
-                    pass
-                elif r2.status_code == 200:
-                    break
-                else:
-                    raise AssertionError('response not successful')
-            else:
-                raise IOError(static_constants._ERROR_CODES['429'])
-        return r2
+    def _note_total_estimated_matches(self, total_estimated_matches):
+        # every page's estimate is kept for the paging loop; only the first one gets announced.
+        self._page.estimate = int(total_estimated_matches)
+        if not self.total_estimated_matches:
+            if self._verbose:
+                log.info('Bing says there are an estimated %s results matching your query', total_estimated_matches)
+            self.total_estimated_matches = int(total_estimated_matches)
+
+    def _raw_entries(self, json_response):
+        """The list of raw JSON result entries in a response, untouched. Notes the page's estimate on the way."""
+        if json_response.get('_type') == 'SearchResponse':
+            if 'webPages' not in json_response:
+                return []
+            self._note_total_estimated_matches(json_response['webPages']['totalEstimatedMatches'])
+            return json_response['webPages'].get('value', [])
+        if 'totalEstimatedMatches' in json_response:
+            self._note_total_estimated_matches(json_response['totalEstimatedMatches'])
+        return json_response.get('value', [])
+
+    def _result_batch(self, json_response, first_rank):
+        """
+        A response's entries as a columnar.ResultBatch. Every entry is ranked before self.dedup drops any,
+        same as the ParsePool path, so a dropped duplicate doesn't shift the ranks of the results after it.
+        """
+        from .columnar import ResultBatch
+        json_entries = self._raw_entries(json_response)
+        return self._page_results(ResultBatch.from_json_entries(json_entries, first_rank=first_rank), len(json_entries))
+
+    def _page_entries(self, json_entries, url_field='url'):
+        """
+        Every page's raw entries pass through here before they're packaged/trimmed/columned.
+        Records how many Bing sent in self.last_page_size, then drops entries self.dedup has already seen
+        & records the share that was new in self.last_page_yield.
+        """
+        self._page.size = len(json_entries)
+        if self.dedup is None or not json_entries:
+            return json_entries
+        new_entries = self.dedup.filter_entries(json_entries, url_field)
+        self._page.new_share = float(len(new_entries)) / len(json_entries)
+        return new_entries
+
+    def _page_results(self, results, page_size):
+        """_page_entries() for results that come back already packaged, i.e. from self.parse_pool."""
+        self._page.size = page_size
+        if self.dedup is None or not page_size:
+            return results
+        if isinstance(results, list):
+            new_results = [single_result for single_result in results
+                           if not single_result.url or self.dedup.add(single_result.url)]
+        else:
+            new_results = results.filtered([not url or self.dedup.add(url) for url in results.column('url')])
+        self._page.new_share = float(len(new_results)) / page_size
+        return new_results
+
+    def _package_entries(self, json_entries, news=False):
+        """Wraps each JSON entry in the result class this instance is set up to use."""
+        json_entries = self._page_entries(json_entries)
+        if self.slim_results:
+            result_class = SlimNewsResult if news else SlimWebResult
+            keep_json = self.keep_json
+            return [result_class(single_json_entry, keep_json) for single_json_entry in json_entries]
+        result_class = NewsResult if news else WebResult
+        return [result_class(single_json_entry) for single_json_entry in json_entries]
+
+    def _package_media_entries(self, json_entries, result_class):
+        """_package_entries() for image & video entries. Their JSON is kept unless slim_results=True."""
+        json_entries = self._page_entries(json_entries, url_field='contentUrl')
+        keep_json = self.keep_json or not self.slim_results
+        return [result_class(single_json_entry, keep_json) for single_json_entry in json_entries]
 
     ###############################################
     ##             change the query              ##
@@ -304,7 +666,7 @@ class BingSearch(object):
             assert type(new_key) is str and len(new_key) == 32
             if self._key == new_key:
                 if verbose == True:
-                    print 'INFO: API key equals previous. No reassignment.'
+                    log.info('API key equals previous. No reassignment.')
                 pass
             self.total_estimated_matches = 0
             self._key = new_key
@@ -312,7 +674,7 @@ class BingSearch(object):
             assert type(new_query) is str
             if self.query_plaintext == new_query:
                 if verbose == True:
-                    print 'INFO: Query equals previous. No reassignment.'
+                    log.info('Query equals previous. No reassignment.')
                 pass
             self.total_estimated_matches = 0
             self.query_plaintext = new_query
@@ -320,10 +682,13 @@ class BingSearch(object):
             assert new_endpoint in static_constants.API_ENDPOINTS.keys()
             if self.endpoint_type == new_endpoint:
                 if verbose == True:
-                    print 'INFO: Endpoint equals previous. No reassignment.'
+                    log.info('Endpoint equals previous. No reassignment.')
                 pass
             self.total_estimated_matches = 0
             self.endpoint_type = new_endpoint
+        if new_endpoint is not None or new_headers is not None or new_params is not None:
+            # the template's pre-encoded url no longer matches what this instance would send.
+            self.template = None
         if new_headers is None and new_params is None:
             self._init_constructor_funcs(rewrite=True, skip_cleaning_headers_and_params=True)
         else:
@@ -346,6 +711,54 @@ class BingSearch(object):
         #TODO: store some portion of the previous call for anal-y-sis.
         pass
     
+    def for_query(self, query, params=None, endpoint=None):
+        """
+        Cheap alternative to reset(new_query=...) for running lots of queries w/ the same config.
+
+        Returns a shallow copy of this instance pointed at `query`. Headers, session, rate-limiter & endpoint
+        are shared w/ the original; nothing is re-validated or printed. Counters start from zero.
+        :param query: new value to put in q={}
+        :param params: dict of URL params to layer on top of this instance's params <OPTIONAL>
+        :param endpoint: endpoint to point the copy at instead of this one's, EX -- 'images' <OPTIONAL>
+        :return BingSearch:
+        """
+        assert isinstance(query, basestring)
+        if endpoint is not None and endpoint != self.endpoint_type:
+            assert endpoint in self.api_endpoints
+            clone = self._clone(query, endpoint=endpoint)
+            clone.base_url = self.api_endpoints[endpoint]
+            # a template's pre-encoded url is for its own endpoint.
+            clone.template = None
+        else:
+            clone = self._clone(query)
+        clone.params = self.params.copy()
+        if params:
+            clone.params.update(params)
+            clone.params = _clear_null_vals(clone.params)
+        return clone
+
+    def _clone(self, query, endpoint=None):
+        """
+        for_query() w/o its params copy: the clone's self.params IS this instance's. Only for callers whose
+        instances never touch self.params in place, EX -- QueryTemplate.search().
+        """
+        # what copy() does for a plain instance, minus its generic __reduce_ex__ machinery.
+        clone = type(self).__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.query_plaintext = query
+        if endpoint is not None:
+            clone.endpoint_type = endpoint
+        if 'categories' not in clone.endpoint_type:
+            clone._encoded_q = _encode_query(query)
+        else:
+            clone._encoded_q = clone._handle_categorical_query()
+        clone.queries_run = 0
+        clone._page = _PageState()
+        clone.total_estimated_matches = 0
+        clone._url_comparisons = deque(maxlen=self.history_size)
+        clone._predicted_urls = deque(maxlen=self.history_size)
+        return clone
+
     def reset(self, new_key=None, new_query=None, new_endpoint=None, verbose=True, new_headers=None, new_params=None):
         """
         Use this function to reset a BingSearch instance with a new query-state.
@@ -398,29 +811,56 @@ class BingSearch(object):
             raise ValueError('can only accept int or iterable of len == 2')
 
     
-    def _pagination_loop(self, rec_count_desired, paging_attempts, return_type_function, break_on_nth_page=100):
-        # import pdb
-        # pdb.set_trace()
-        """Soooooooo this guy. Essentially this is where the really convoluted magic happens."""
+    @staticmethod
+    def _plan_pages(start, rec_count_desired, paging_attempts):
+        """
+        Lays out every request a paging run will make before any of them are sent.
+        :param start: offset of the first record wanted.
+        :param rec_count_desired: total number of records wanted.
+        :param paging_attempts: number of pages, as returned by _determine_num_of_paging_attempts()
+        :return: list of (offset, count) tuples in offset order.
+        """
+        plan = []
+        for page_num in range(paging_attempts):
+            offset = start + page_num * 50
+            count = min(50, start + rec_count_desired - offset)
+            if count <= 0:
+                break
+            plan.append((offset, count))
+        return plan
+
+    def _fetch_page(self, return_type_function, params=None):
+        """Makes one request & hands back a list shaped by return_type_function."""
 
         # defining all possible functions as sub-calls for safetyism.
+        # links only need 'url', so the rest of each result is dropped right after decoding, never packaged.
         def links_plaintext(SearchObj):
-            return [decode_response_url(i.url) for i in SearchObj.search_2_packaged_json()]
+            return decode_response_urls([i['url'] for i in SearchObj.search_2_fields(('url',), params=params)])
 
         def links_encoded(SearchObj):
-            return [i.url for i in SearchObj.search_2_packaged_json()]
+            return [i['url'] for i in SearchObj.search_2_fields(('url',), params=params)]
 
         def json_packaged(SearchObj):
-            return [i for i in SearchObj.search_2_packaged_json()]
+            if SearchObj.parse_pool is not None:
+                return SearchObj.search_2_pooled('slim', params=params) or []
+            return [i for i in SearchObj.search_2_packaged_json(params=params) or []]
 
         def json_raw(SearchObj):
-            foo = SearchObj.search_2_json()
+            foo = SearchObj.search_2_json(params=params)
+            SearchObj._page.size = len(SearchObj._raw_entries(foo))
             return [foo]
 
         def full_response(SearchObj):
-            foo = SearchObj.search_2_response_obj()
+            foo = SearchObj.search_2_response_obj(params=params)
             return [foo]
 
+        def columnar(SearchObj):
+            if SearchObj.parse_pool is not None:
+                return [SearchObj.search_2_pooled('columnar', params=params)]
+            first_rank = int((SearchObj.params if params is None else params).get('offset', 0))
+            raw_json = SearchObj.search_2_json(params=params)
+            return [SearchObj._result_batch(raw_json, first_rank)]
+
         # dict fulla functions.
         function_types = {
             'links_plaintext': links_plaintext,
@@ -428,59 +868,38 @@ class BingSearch(object):
             'json_packaged': json_packaged,
             'json_raw': json_raw,
             'full_response': full_response,
+            'columnar': columnar,
         }
         assert return_type_function in function_types.keys(), 'Invalid function passed to pagination loop. \nValid params are {}'.format(', '.join(function_types.keys()))
-        rec_count_actual = 0
-        current_attempt = 1
-        full_package = []
-        # passing
-        desired_attempts = paging_attempts
-        if desired_attempts > break_on_nth_page:
-            print 'WARNING: break_on_nth_page set to {}, but {} pages requested.'.format(break_on_nth_page,
-                                                                                         paging_attempts)
-            desired_attempts = break_on_nth_page
-        while current_attempt <= desired_attempts:
-            # This if-statement will only kick in for the last page of results
-            if rec_count_desired - rec_count_actual < 50:
-                diff = rec_count_desired - rec_count_actual
-                self.params.update({'count': diff})
-            newlist = function_types[return_type_function](self)
-            full_package += newlist
-            rec_count_actual += len(newlist)
-            current_attempt += 1
-        return full_package
-    
+        return function_types[return_type_function](self)
+
+    def _page_params(self, offset, count):
+        """Copy of self.params pointed at one page. Leaves self.params alone so pages can be fetched side by side."""
+        page_params = self.params.copy()
+        page_params.update({'offset': str(offset), 'count': str(count)})
+        return page_params
+
+    @staticmethod
+    def _cap_paging_attempts(paging_attempts, break_on_nth_page):
+        if paging_attempts > break_on_nth_page:
+            log.warning('break_on_nth_page set to %s, but %s pages requested.', break_on_nth_page,
+                        paging_attempts)
+            return break_on_nth_page
+        return paging_attempts
 
-    def page(self, count_or_range=None, return_type_function='links_plaintext', break_on_nth_page=100, **kwargs):
+    def _resolve_paging_args(self, count_or_range):
         """
-        :param count_or_range:
-                    (type == int > 0) OR (type == Iterable AND len() == 2 AND min(Iterable) > 0).
-                    Setting this equal to None will grab the first 50 records.
-        :param return_type_function:
-                    Options - 'links_plaintext', 'links_encoded', 'json_packaged', 'json_raw', 'full_response'
-        :param break_on_nth_page:
-                    Sidestepping the human error of accidentally sticking in an extra zero.
-        :param kwargs:
-                    Frankly nothing isn't accounted for at this point. Leaving the option open for later.
-        :return:
-                 An array of results. Their format will depend on the return_type_function you pass.
-                 The default is a list of plaintext links.
+        Turns page()'s count_or_range into (start, rec_count_desired, paging_attempts).
+        See page() for what count_or_range may be.
         """
         if not count_or_range:
-            full_package = self._pagination_loop(50, 1)
-            return full_package
-        # if count given as single digit, assume starting from 0
+            return int(self.params.get('offset', 0)), 50, 1
+        # if count given as single digit, assume starting from the current offset
         elif type(count_or_range) == int:
             assert count_or_range >= 1, 'must provide positive count'
             rec_count_desired = count_or_range
             paging_attempts = BingSearch._determine_num_of_paging_attempts(rec_count_desired)
-
-            # The below, terrible-terrible kwargs-handling starting at **dict(.....
-            # prevents arbitrary kwargs from getting into the pagination process.
-            # inspect makes an array of specific kwargs from the function being called.
-            # I use this as a filter.
-            return BingSearch._pagination_loop(self, rec_count_desired=rec_count_desired, paging_attempts=paging_attempts,
-                                    return_type_function=return_type_function, break_on_nth_page=break_on_nth_page)
+            return int(self.params.get('offset', 0)), rec_count_desired, paging_attempts
         # allow for a given range.
         elif isinstance(count_or_range, Iterable):
             # Must have len == 2
@@ -493,12 +912,286 @@ class BingSearch(object):
             elif count_or_range[0] == count_or_range[1]:
                 raise ValueError("must specify range larger than 1")
             start, stop = count_or_range[0], count_or_range[1]
-            rec_count_desired = stop - start
             # TODO: unit testing for `_determine_num_of_paging_attempts()`
             paging_attempts = BingSearch._determine_num_of_paging_attempts(count_or_range)
-            self.params.update({'offset': str(start)})
-            return self._pagination_loop( rec_count_desired=rec_count_desired, paging_attempts=paging_attempts,
-                                    return_type_function=return_type_function, break_on_nth_page=break_on_nth_page)
+            # rebound, not updated in place: QueryTemplate.search() instances share one params dict.
+            self.params = self.params.copy()
+            self.params['offset'] = str(start)
+            return start, stop - start, paging_attempts
+        else:
+            raise ValueError('can only accept int or iterable of len == 2')
+
+    def _pagination_loop(self, start, rec_count_desired, paging_attempts, return_type_function, break_on_nth_page=100,
+                         min_new_yield=None):
+        """Soooooooo this guy. Essentially this is where the really convoluted magic happens."""
+        full_package = []
+        for page_of_results in self._iter_planned_pages(start, rec_count_desired, paging_attempts, return_type_function,
+                                                        break_on_nth_page=break_on_nth_page, prefetch=False,
+                                                        min_new_yield=min_new_yield):
+            full_package.extend(page_of_results)
+        return full_package
+
+    @property
+    def last_page_size(self):
+        """# of results Bing sent for the last page fetched on this thread. None if the return type couldn't tell."""
+        return self._page.size
+
+    @property
+    def last_page_yield(self):
+        """Share of the last page's results which were new to self.dedup. None when not deduping."""
+        return self._page.new_share
+
+    @property
+    def last_page_estimate(self):
+        """totalEstimatedMatches of the last page fetched on this thread."""
+        return self._page.estimate
+
+    @staticmethod
+    def _paging_stop_reason(page_state, count_requested, next_offset, min_new_yield=None):
+        """
+        Looks at a page just fetched & says why the next one isn't worth requesting, or None if it is.
+        :param page_state: the _PageState.snapshot() _fetch_planned_page() handed back w/ the page.
+        :param count_requested: count the page just fetched asked for.
+        :param next_offset: offset of the page that would come next.
+        """
+        size, new_share, estimate = page_state['size'], page_state['new_share'], page_state['estimate']
+        if size is not None:
+            if size == 0:
+                return 'empty page'
+            if size < count_requested:
+                return 'short page'
+        if estimate is not None and next_offset >= estimate:
+            return 'past totalEstimatedMatches'
+        if min_new_yield is not None and new_share is not None and new_share < min_new_yield:
+            return 'new-result yield below min_new_yield'
+        return None
+
+    @staticmethod
+    def _new_paging_report(plan):
+        return {'planned': len(plan), 'sent': 0, 'saved': len(plan), 'stopped_because': None}
+
+    def _fetch_planned_page(self, offset_and_count, return_type_function):
+        """
+        Fetches one planned page on the calling thread.
+        :return: (page of results, _PageState.snapshot() of that page). Nothing about the page is left on self.
+        """
+        # clear what the last page looked like, so a return type which can't tell never trips a stop.
+        self._page.clear()
+        page_of_results = self._fetch_page(return_type_function, params=self._page_params(*offset_and_count))
+        return page_of_results, self._page.snapshot()
+
+    def _iter_planned_pages(self, start, rec_count_desired, paging_attempts, return_type_function,
+                            break_on_nth_page=100, prefetch=True, min_new_yield=None):
+        """
+        Generator behind _pagination_loop & iter_pages. Yields one list of results per page, in offset order.
+
+        Paging stops early once Bing runs out: after an empty or short page, or once the next offset is past
+        the totalEstimatedMatches of the last page. self.paging_report says how many requests that saved.
+        With prefetch=True the next page is requested on a background thread while the caller works on the
+        current one. If the caller stops early, at most that one extra page is fetched.
+        min_new_yield stops paging after a page where less than that share of results got past self.dedup.
+        """
+        paging_attempts = BingSearch._cap_paging_attempts(paging_attempts, break_on_nth_page)
+        plan = BingSearch._plan_pages(start, rec_count_desired, paging_attempts)
+        # this run's own report. Only ever touched on the consumer's thread.
+        report = self.paging_report = BingSearch._new_paging_report(plan)
+
+        def count_sent():
+            report['sent'] += 1
+            report['saved'] -= 1
+
+        def next_after(page_num, page_state):
+            """The next planned page, or None if there isn't one or it isn't worth sending."""
+            # the consumer's thread sees the page it's about to get in last_page_size & co.
+            self._page.restore(page_state)
+            if page_num + 1 >= len(plan):
+                return None
+            report['stopped_because'] = self._paging_stop_reason(page_state, plan[page_num][1],
+                                                                 plan[page_num + 1][0], min_new_yield)
+            return None if report['stopped_because'] else plan[page_num + 1]
+
+        if not plan:
+            return
+        if not prefetch:
+            page_num, offset_and_count = 0, plan[0]
+            while offset_and_count is not None:
+                count_sent()
+                page_of_results, page_state = self._fetch_planned_page(offset_and_count, return_type_function)
+                offset_and_count = next_after(page_num, page_state)
+                page_num += 1
+                yield page_of_results
+            return
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(1)
+        try:
+            count_sent()
+            pending = pool.apply_async(self._fetch_planned_page, (plan[0], return_type_function))
+            page_num = 0
+            while pending is not None:
+                # the prefetch thread's page state comes back w/ its page, never through self.
+                page_of_results, page_state = pending.get()
+                next_offset_and_count = next_after(page_num, page_state)
+                if next_offset_and_count:
+                    count_sent()
+                    pending = pool.apply_async(self._fetch_planned_page, (next_offset_and_count, return_type_function))
+                else:
+                    pending = None
+                page_num += 1
+                yield page_of_results
+        finally:
+            # don't join: a prefetch still in flight is left to finish on its own.
+            pool.close()
+
+    def _concurrent_pagination(self, start, rec_count_desired, paging_attempts, return_type_function,
+                               break_on_nth_page=100, max_workers=4, max_qps=None):
+        """
+        Same contract as _pagination_loop, but every page is planned up front & fetched on a thread pool.
+        Pages come back in offset order no matter which request finishes first.
+
+        The first page is fetched on its own, so its totalEstimatedMatches (or it coming back short) can
+        trim the plan before the rest go out all at once.
+        """
+        paging_attempts = BingSearch._cap_paging_attempts(paging_attempts, break_on_nth_page)
+        plan = BingSearch._plan_pages(start, rec_count_desired, paging_attempts)
+        report = BingSearch._new_paging_report(plan)
+        if not plan:
+            self.paging_report = report
+            return []
+        from multiprocessing.pool import ThreadPool
+        from .rate_limiting import RateLimiter
+        limiter = RateLimiter(max_qps) if max_qps else None
+
+        def fetch(offset_and_count):
+            if limiter is not None:
+                limiter.acquire()
+            return self._fetch_planned_page(offset_and_count, return_type_function)
+
+        # (page of results, page state) pairs. The pool's threads never write paging state to self.
+        fetched = [fetch(plan[0])]
+        first_page_estimate = fetched[0][1]['estimate']
+        rest_of_plan = plan[1:]
+        if rest_of_plan:
+            report['stopped_because'] = BingSearch._paging_stop_reason(fetched[0][1], plan[0][1], rest_of_plan[0][0])
+            if report['stopped_because']:
+                rest_of_plan = []
+            elif first_page_estimate is not None:
+                rest_of_plan = [(offset, count) for offset, count in rest_of_plan if offset < first_page_estimate]
+                if len(rest_of_plan) < len(plan) - 1:
+                    report['stopped_because'] = 'past totalEstimatedMatches'
+        report['sent'] = 1 + len(rest_of_plan)
+        report['saved'] = len(plan) - report['sent']
+        if rest_of_plan:
+            pool = ThreadPool(min(max_workers, len(rest_of_plan)))
+            try:
+                # ThreadPool.map() hands results back in the same order as the plan.
+                fetched.extend(pool.map(fetch, rest_of_plan))
+            finally:
+                # close, not terminate: terminate() blocks ~0.1s waiting on the pool's handler thread.
+                pool.close()
+        # merged in plan order, so the caller's last_page_size & co. describe the last page, not the last to land.
+        self._page.restore(fetched[-1][1])
+        self.paging_report = report
+        full_package = []
+        for page_of_results, _ in fetched:
+            full_package.extend(page_of_results)
+        return full_package
+
+    def page(self, count_or_range=None, return_type_function='links_plaintext', break_on_nth_page=100,
+             concurrent=False, max_workers=4, max_qps=None, min_new_yield=None, **kwargs):
+        """
+        :param count_or_range:
+                    (type == int > 0) OR (type == Iterable AND len() == 2 AND min(Iterable) > 0).
+                    Setting this equal to None will grab the first 50 records.
+        :param return_type_function:
+                    Options - 'links_plaintext', 'links_encoded', 'json_packaged', 'json_raw', 'full_response', 'columnar'
+                    'columnar' returns a single columnar.ResultBatch instead of a list.
+        :param break_on_nth_page:
+                    Sidestepping the human error of accidentally sticking in an extra zero.
+        :param concurrent:
+                    Set to True to fetch all pages at once on a thread pool instead of one after another.
+        :param max_workers:
+                    Size of the thread pool used when concurrent=True.
+        :param max_qps:
+                    Queries-per-second ceiling for concurrent=True. None means no pacing.
+        :param min_new_yield:
+                    Needs self.dedup. Stop paging after a page where less than this share (0-1) of the results
+                    were new. Ignored when concurrent=True, since every page is already in flight.
+        :param kwargs:
+                    Frankly nothing isn't accounted for at this point. Leaving the option open for later.
+        :return:
+                 An array of results. Their format will depend on the return_type_function you pass.
+                 The default is a list of plaintext links.
+
+        Paging stops as soon as Bing runs out of results (an empty or short page, or an offset past its
+        totalEstimatedMatches). Afterwards self.paging_report holds
+        {'planned': n, 'sent': n, 'saved': n, 'stopped_because': str or None}.
+        Every run gets a report of its own; w/ several runs on one searcher at once (EX -- AsyncBingSearch.page()),
+        self.paging_report is whichever finished last. last_page_size & co. are per thread: after page() they
+        describe the last page of the range on the thread that called it.
+        """
+        start, rec_count_desired, paging_attempts = self._resolve_paging_args(count_or_range)
+        if concurrent:
+            full_package = self._concurrent_pagination(start, rec_count_desired=rec_count_desired, paging_attempts=paging_attempts,
+                                                       return_type_function=return_type_function, break_on_nth_page=break_on_nth_page,
+                                                       max_workers=max_workers, max_qps=max_qps)
+        else:
+            full_package = self._pagination_loop(start, rec_count_desired=rec_count_desired, paging_attempts=paging_attempts,
+                                                 return_type_function=return_type_function, break_on_nth_page=break_on_nth_page,
+                                                 min_new_yield=min_new_yield)
+        if return_type_function == 'columnar':
+            # one ResultBatch per page --> one for the lot.
+            from .columnar import ResultBatch
+            return ResultBatch.concat(full_package)
+        return full_package
+
+    def iter_pages(self, count_or_range=None, return_type_function='links_plaintext', break_on_nth_page=100,
+                   prefetch=True, min_new_yield=None):
+        """
+        Streaming version of page(). Same args, but yields one list of results per page as soon as it arrives.
+
+        Nothing is held onto between pages, & requests stop as soon as you stop iterating.
+        w/ return_type_function='columnar' each page is a one-item list holding that page's ResultBatch.
+        :param prefetch: request the next page in the background while you work on the current one.
+        :param min_new_yield: see page().
+        :return: generator of lists, one per page.
+        """
+        start, rec_count_desired, paging_attempts = self._resolve_paging_args(count_or_range)
+        return self._iter_planned_pages(start, rec_count_desired, paging_attempts, return_type_function,
+                                        break_on_nth_page=break_on_nth_page, prefetch=prefetch,
+                                        min_new_yield=min_new_yield)
+
+    def iter_results(self, count_or_range=None, return_type_function='links_plaintext', break_on_nth_page=100,
+                     prefetch=True, min_new_yield=None):
+        """Like iter_pages(), but yields the results themselves, one at a time."""
+        for page_of_results in self.iter_pages(count_or_range, return_type_function, break_on_nth_page, prefetch,
+                                               min_new_yield):
+            for single_result in page_of_results:
+                yield single_result
+
+    ###############################################
+    ##      memory held by long-lived instances  ##
+    ###############################################
+    def retained_memory(self):
+        """
+        Bytes this instance is holding on to, by where they're held. Measured when called, so it's not free.
+        Shared pieces (a cache, dedup index or the url-decoding memo used by other searchers too) are counted
+        in full here. Results aren't counted: BingSearch hands them back & never keeps them.
+
+        :return dict: 'history', 'params_and_headers', 'cache', 'dedup', 'url_decoding_memo' & 'total'.
+        """
+        from .caching import MemoryCache
+        from .sizing import deep_sizeof
+        from .url_decoding import _memo
+        retained = {
+            'history': deep_sizeof((self._url_comparisons, self._predicted_urls)),
+            'params_and_headers': deep_sizeof((self.params, self.headers)),
+            # a DiskCache's entries are on disk, not in this process.
+            'cache': self.cache.stats()['bytes'] if isinstance(self.cache, MemoryCache) else 0,
+            'dedup': self.dedup.stats()['bytes'] if self.dedup is not None else 0,
+            'url_decoding_memo': deep_sizeof(_memo),
+        }
+        retained['total'] = sum(retained.values())
+        return retained
 
 
 ###############################################
@@ -542,6 +1235,9 @@ class WebResult(object):
     def __repr__(self):
         return '{}'.format(self.display_url)
 
+    def as_dict(self):
+        return dict(self.__dict__)
+
 
 class NewsResult(object):
     def __init__(self, result):
@@ -574,6 +1270,191 @@ class NewsResult(object):
 
     def __str__(self):
         return 'NewsResult'
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class _SlottedResult(object):
+    '''
+    What the __slots__-based result classes share. Subclasses list their attributes, plus
+    '_url_decoded', in __slots__ & set .url. Everything here goes by type(self).__slots__.
+    '''
+    __slots__ = ()
+
+    @property
+    def url_decoded(self):
+        if self._url_decoded is None and self.url:
+            self._url_decoded = decode_response_url(self.url)
+        return self._url_decoded
+
+    def as_dict(self):
+        """Every attribute, .url_decoded included, as a plain dict."""
+        result_dict = dict((slot, getattr(self, slot)) for slot in type(self).__slots__ if not slot.startswith('_'))
+        result_dict['url_decoded'] = self.url_decoded
+        return result_dict
+
+    # no __dict__ for pickle to fall back on, so parse_pool ships the slot values in __slots__ order.
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in type(self).__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(type(self).__slots__, state):
+            setattr(self, slot, value)
+
+
+class SlimWebResult(_SlottedResult):
+    '''
+    Memory-light stand-in for WebResult. Same attributes, but:
+        - built on __slots__, so there's no per-instance __dict__.
+        - .title & .description are properties aliasing .name & .snippet rather than copies.
+        - .url_decoded is only worked out the first time you ask for it.
+        - .json is None unless the instance was made w/ keep_json=True.
+    '''
+    __slots__ = ('url', 'display_url', 'name', 'snippet', 'id', 'date_crawled', 'about', 'json', '_url_decoded')
+
+    def __init__(self, result, keep_json=False):
+        get = result.get
+        self.url = get('url')
+        self.display_url = get('displayUrl')
+        self.name = get('name')
+        self.snippet = get('snippet')
+        self.id = get('id')
+        self.date_crawled = get('dateLastCrawled')
+        self.about = get('about')
+        self.json = result if keep_json else None
+        self._url_decoded = None
+
+    # maintain compatibility
+    @property
+    def title(self):
+        return self.name
+
+    @property
+    def description(self):
+        return self.snippet
+
+    def __str__(self):
+        return 'WebResponse Obj: {}'.format(self.display_url)
+
+    def __repr__(self):
+        return '{}'.format(self.display_url)
+
+
+class SlimNewsResult(_SlottedResult):
+    '''Memory-light stand-in for NewsResult. See SlimWebResult for what's different.'''
+    __slots__ = ('about_name', 'about_readlink', 'image_url', 'image_width', 'image_height', 'provider_type',
+                 'provider_name', 'category', 'name', 'date_published', 'description', 'url', 'json', '_url_decoded')
+
+    def __init__(self, result, keep_json=False):
+        get = result.get
+        about = get('about')
+        self.about_name = about[0].get('name') if about else None
+        self.about_readlink = about[0].get('readLink') if about else None
+        thumbnail = (get('image') or {}).get('thumbnail') or {}
+        self.image_url = thumbnail.get('contentUrl')
+        self.image_width = thumbnail.get('width')
+        self.image_height = thumbnail.get('height')
+        provider = get('provider')
+        self.provider_type = provider[0].get('_type') if provider else None
+        self.provider_name = provider[0].get('name') if provider else None
+        self.category = get('category')
+        self.name = get('name')
+        self.date_published = get('datePublished')
+        self.description = get('description')
+        self.url = get('url')
+        self.json = result if keep_json else None
+        self._url_decoded = None
+
+    def __str__(self):
+        return 'NewsResult'
+
+
+class ImageResult(_SlottedResult):
+    '''
+    One entry from the images endpoint. Built on __slots__ like SlimWebResult.
+
+    IRi.url: the image itself (Bing's contentUrl). .url_decoded is worked out the first time you ask for it.
+    IRi.host_page_url: the page the image was found on.
+    IRi.thumbnail_url, IRi.width, IRi.height, IRi.encoding_format, IRi.content_size: what they sound like.
+    IRi.json: full JSON entry, or None if the instance was made w/ keep_json=False.
+    '''
+    __slots__ = ('name', 'url', 'host_page_url', 'host_page_display_url', 'web_search_url', 'thumbnail_url',
+                 'thumbnail_width', 'thumbnail_height', 'width', 'height', 'encoding_format', 'content_size',
+                 'date_published', 'json', '_url_decoded')
+
+    def __init__(self, result, keep_json=False):
+        get = result.get
+        self.name = get('name')
+        self.url = get('contentUrl')
+        self.host_page_url = get('hostPageUrl')
+        self.host_page_display_url = get('hostPageDisplayUrl')
+        self.web_search_url = get('webSearchUrl')
+        self.thumbnail_url = get('thumbnailUrl')
+        thumbnail = get('thumbnail') or {}
+        self.thumbnail_width = thumbnail.get('width')
+        self.thumbnail_height = thumbnail.get('height')
+        self.width = get('width')
+        self.height = get('height')
+        self.encoding_format = get('encodingFormat')
+        self.content_size = get('contentSize')
+        self.date_published = get('datePublished')
+        self.json = result if keep_json else None
+        self._url_decoded = None
+
+    def __str__(self):
+        return 'ImageResult: {}'.format(self.host_page_display_url)
+
+    def __repr__(self):
+        return '{}'.format(self.host_page_display_url)
+
+
+class VideoResult(_SlottedResult):
+    '''
+    One entry from the videos endpoint. Built on __slots__ like SlimWebResult.
+
+    VRi.url: the video itself (Bing's contentUrl). .url_decoded is worked out the first time you ask for it.
+    VRi.host_page_url: the page it's embedded in.
+    VRi.publisher: name of the first publisher listed, EX -- 'YouTube'.
+    VRi.duration: ISO 8601 duration string, EX -- 'PT4M13S'.
+    VRi.json: full JSON entry, or None if the instance was made w/ keep_json=False.
+    '''
+    __slots__ = ('name', 'description', 'url', 'host_page_url', 'web_search_url', 'thumbnail_url', 'publisher',
+                 'duration', 'view_count', 'width', 'height', 'encoding_format', 'date_published', 'json',
+                 '_url_decoded')
+
+    def __init__(self, result, keep_json=False):
+        get = result.get
+        self.name = get('name')
+        self.description = get('description')
+        self.url = get('contentUrl')
+        self.host_page_url = get('hostPageUrl')
+        self.web_search_url = get('webSearchUrl')
+        self.thumbnail_url = get('thumbnailUrl')
+        publisher = get('publisher')
+        self.publisher = publisher[0].get('name') if publisher else None
+        self.duration = get('duration')
+        self.view_count = get('viewCount')
+        self.width = get('width')
+        self.height = get('height')
+        self.encoding_format = get('encodingFormat')
+        self.date_published = get('datePublished')
+        self.json = result if keep_json else None
+        self._url_decoded = None
+
+    def __str__(self):
+        return 'VideoResult: {}'.format(self.name)
+
+    def __repr__(self):
+        return '{}'.format(self.name)
+
+
+# response '_type' --> result class, for the verticals packaged beyond web & news.
+MEDIA_RESULT_CLASSES = {
+    'Images': ImageResult,
+    'Videos': VideoResult,
+}
+
 ###############################################
 ##                                           ##
 ##          class-independent funcs          ##
@@ -583,21 +1464,12 @@ def _clear_null_vals(dictionary):
     """iterates over a dict forward-ways. Deletes NoneType entries."""
     return OrderedDict((k, v) for k, v in dictionary.items() if v)
 
-def decode_response_url(bing_encoded_url):
-    import urllib
-    new_url = bing_encoded_url[153:-15].lstrip('=')
-    ans = urllib.unquote(new_url).decode('utf8')
-    # if, for any reason, urllib.unquote() fails, try again manually with binascii:
-    if ans == bing_encoded_url[153:-15].lstrip('='):
-        import binascii
-        # yes it appears to be this easy.
-        new_url = bing_encoded_url[153:-15].lstrip('=')
-        new_new_url = new_url.replace('%3a', binascii.a2b_hex('3a'))
-        new_url = new_new_url.replace('%2f', binascii.a2b_hex('2f'))
-        new_new_url = new_url.replace('%3f', binascii.a2b_hex('3f'))
-        ans2 = new_new_url.replace('%3d', binascii.a2b_hex('3d'))
-        return ans2
-    else: return ans
+def _encode_query(query):
+    """'q=...' for a str or unicode query. urlencode() can't take non-ASCII unicode, so it goes in as UTF-8."""
+    if isinstance(query, unicode):
+        query = query.encode('utf8')
+    # same string urlencode(dict(q=query)) builds, w/o going through a dict.
+    return 'q=' + quote_plus(query)
 
 def validate_request_response(response):
     """
@@ -608,11 +1480,11 @@ def validate_request_response(response):
     """
     if not response.status_code == 200:
         if response.status_code == 429:
-            print('queries/second quota exceeded. this func will make 5 attempts to resend.')
+            log.warning('queries/second quota exceeded & retries used up.')
             return '429'
         elif response.status_code == 400:
             json = response.json()
-            print '400 error: Bad params\n\nBing is showing {} param(s) set to {}'.format(json['errors'][0]['parameter'], json['errors'][0]['value'])
+            log.error('400 error: Bad params\n\nBing is showing %s param(s) set to %s', json['errors'][0]['parameter'], json['errors'][0]['value'])
             raise ValueError()
         elif str(response.status_code) in list(static_constants._ERROR_CODES.keys()):
             raise AssertionError(static_constants._ERROR_CODES[str(response.status_code)])
@@ -629,9 +1501,9 @@ def validate_request_response(response):
 class static_constants():
     API_ENDPOINTS = {
         'web': 'https://api.cognitive.microsoft.com/bing/v5.0/search?', # <-- SUPPORTED
-        'images': 'https://api.cognitive.microsoft.com/bing/v5.0/images/search?',
+        'images': 'https://api.cognitive.microsoft.com/bing/v5.0/images/search?', # <-- SUPPORTED
         'images_trending': 'https://api.cognitive.microsoft.com/bing/v5.0/images/trending/search?', # <-- works only for mkt= en-US, en-CA, and en-AU
-        'videos': 'https://api.cognitive.microsoft.com/bing/v5.0/videos/search?',
+        'videos': 'https://api.cognitive.microsoft.com/bing/v5.0/videos/search?', # <-- SUPPORTED
         'videos_trending': 'https://api.cognitive.microsoft.com/bing/v5.0/videos/trending/search?',
         'videos_details': 'https://api.cognitive.microsoft.com/bing/v5.0/videos/details/search?',
         'news': 'https://api.cognitive.microsoft.com/bing/v5.0/news/search?', # <-- SUPPORTED
@@ -700,5 +1572,5 @@ if __name__ == '__main__':
     # Gives plaintext URLs of the first 10 records returned
     print [decode_response_url(i.url) for i in res_list[:10]]
     # Create a list of dictionaries from a list of WebResults. Print first record.
-    res_list_converted_to_dicts = [WR.__dict__ for WR in res_list]
+    res_list_converted_to_dicts = [WR.as_dict() for WR in res_list]
     print res_list_converted_to_dicts[0]
\ No newline at end of file
@@ -1,8 +1,15 @@
+import logging
 import requests
 from requests.models import urlencode
-from socket import gethostbyname, gethostname
-from collections import OrderedDict
-from time import sleep
+from collections import OrderedDict, deque
+
+from .client_ip import AUTO, resolve_client_ip
+from .connection_pooling import SessionPool
+from .logs import redact_headers
+from .retrying import RetryPolicy
+from .url_decoding import decode_response_url
+
+log = logging.getLogger(__name__)
 
 
 ###############################################
@@ -19,7 +26,7 @@ class local_user_constants():
     ## Enter default-header customizations here. ##
     ###############################################
     HEADERS['User-Agent'] = "Mozilla/5.0 (Windows NT 6.2; Win64; x64; rv:16.0.1) Gecko/20121011 Firefox/16.0.1"
-    HEADERS['X-Search-ClientIP'] = gethostbyname(gethostname())
+    HEADERS['X-Search-ClientIP'] = AUTO     # <--(looked up lazily & cached, see client_ip.client_ip(). Set to None to leave it out)
     HEADERS['X-MSEdge-ClientID'] = None
     HEADERS['Accept'] = None
     HEADERS['Accept-Language'] = None
@@ -51,34 +58,42 @@ class BingLite(object):
     ## Initialization functions and attr-setting ##
     ###############################################
     def __init__(self, api_key, query, endpoint='web', verbose=True,
-                 params=local_user_constants.INCLUDED_PARAMS.copy() , headers=local_user_constants.HEADERS.copy()):
+                 params=local_user_constants.INCLUDED_PARAMS.copy() , headers=local_user_constants.HEADERS.copy(), session=None, rate_limiter=None,
+                 retry_policy=None, api_endpoints=None, history_size=1000):
         self._key = api_key
+        self.session = session if session is not None else SessionPool()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
         self.query_plaintext = query
         self.params = params
         self.headers = headers
         self.current_offset = 0
         self.endpoint_type = endpoint
+        # endpoint name --> URL. Defaults to Bing's; pass bing_simulator.BingSimulator().api_endpoints to test locally.
+        self.api_endpoints = api_endpoints if api_endpoints is not None else local_static_constants.API_ENDPOINTS
         self.queries_run = 0
         self.total_estimated_matches = 0
         self._verbose = verbose
         self.last_predicted_url = None
         self.last_actual_url = None
         self._init_constructor_funcs()
-        self._url_comparisons = []
+        # only the last `history_size` (predicted, actual) url pairs are kept. None keeps all of them.
+        self._url_comparisons = deque(maxlen=history_size)
 
 
     def _init_constructor_funcs(self):
-        self.base_url = local_static_constants.API_ENDPOINTS[self.endpoint_type]
+        self.base_url = self.api_endpoints[self.endpoint_type]
         # encode your query to be URL-rdy
         self._encoded_q = urlencode(dict(q=self.query_plaintext))
         # clean out them' dictionary attrs.
-        self.headers = _clear_null_vals(self.headers)
+        self.headers = resolve_client_ip(_clear_null_vals(self.headers))
         self.params = _clear_null_vals(self.params)
         # inject key into header
         self.headers = self._inject_key_into_header(self.headers)
         self.last_predicted_url = self._predict_url(bypass_setting_attrs=True)
-        if self._verbose:
-            print 'The search-interface has been initialized w/ the following params:\n\nEndpoint-Type: {}\n\nQuery-URL: {}\n\nHeader-Dict: {}'.format(self.endpoint_type, self.last_predicted_url, self.headers)
+        # its args cost more to build than the rest of __init__, so check the level before building them.
+        if self._verbose and log.isEnabledFor(logging.INFO):
+            log.info('The search-interface has been initialized w/ the following params:\n\nEndpoint-Type: %s\n\nQuery-URL: %s\n\nHeader-Dict: %s', self.endpoint_type, self.last_predicted_url, redact_headers(self.headers))
 
     ###############################################
     ##   _methods used BEFORE request is sent    ##
@@ -94,7 +109,8 @@ class BingLite(object):
         OD_w_key_added = OrderedDict()
         if 'Ocp-Apim-Subscription-Key' in header_dictionary.keys():
             if override:
-                print 'API key in supplied dictionary will be replaced.'
+                if self._verbose:
+                    log.info('API key in supplied dictionary will be replaced.')
                 del header_dictionary['Ocp-Apim-Subscription-Key']
             else:
                 raise IndexError('API key detected in dictionary arg. Please set override=True to replace it')
@@ -108,10 +124,12 @@ class BingLite(object):
     ###############################################
 
     def search_2_response_obj(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
         try:
             ##############################
             #           BEHOLD!          #
-            response_object = requests.get(self.base_url + self._encoded_q, params=self.params, headers=self.headers)
+            response_object = self.session.get(self.base_url + self._encoded_q, params=self.params, headers=self.headers)
             ##############################
             self.last_actual_url = response_object.url
             if self._verbose:
@@ -119,21 +137,19 @@ class BingLite(object):
             self.queries_run += 1
             return response_object
         except requests.Timeout:
-            print('request timed out. Aborting search.')
+            log.warning('request timed out. Aborting search.')
             raise Warning('Request timed out')
 
     def search_2_json(self, return_html=False):
-        response_object = self.search_2_response_obj()
+        response_object = self.retry_policy.execute(self.search_2_response_obj)
         # Handle error-codes and Warn about potential garbage results if query URL is too long.
         if len(response_object.url) > 1300:
-            print('WARNING: URL too long at {} characters.\n Bing can silently truncate your query.\n Limit URLs to < 1,200 chars.').format(len(response_object.url))
+            log.warning('URL too long at %s characters.\n Bing can silently truncate your query.\n Limit URLs to < 1,200 chars.', len(response_object.url))
         # import pdb
         # pdb.set_trace()
         response_validated = validate_request_response(response_object)
         if response_validated == '429':
-            response_object = self._handle_429_error(url=response_object.url)
-        else:
-            pass
+            raise IOError(local_static_constants._ERROR_CODES['429'])
         if return_html:
             return response_object.text()
         return response_object.json()
@@ -172,28 +188,12 @@ class BingLite(object):
                 Returned as a LIST of WebResult objects with len == the # of links returned by Bing.
         """
         if not self.total_estimated_matches and self.endpoint_type == 'web':
-            print(('Bing says there are an estimated {} results matching your query'.format(json_response['webPages']['totalEstimatedMatches'])))
+            if self._verbose:
+                log.info('Bing says there are an estimated %s results matching your query', json_response['webPages']['totalEstimatedMatches'])
             self.total_estimated_matches = int(json_response['webPages']['totalEstimatedMatches'])
         packaged_json = [WebResult(single_json_entry) for single_json_entry in json_response['webPages']['value']]
         return packaged_json
 
-    def _handle_429_error(self, url):
-        timeout_cnt = 0
-        while True:
-            if timeout_cnt < 5:
-                sleep(2)
-                r2 = requests.get(url, self.headers)
-                if validate_request_response(r2) == '429':
-                    timeout_cnt += 1
-                    pass
-                elif r2.status_code == 200:
-                    break
-                else:
-                    raise AssertionError('response not successful')
-            else:
-                raise IOError(local_static_constants._ERROR_CODES['429'])
-        return r2
-
 
 
 ###############################################
@@ -239,6 +239,9 @@ class WebResult(object):
     def get_dict(self):
         return self.__dict__
 
+    def as_dict(self):
+        return dict(self.__dict__)
+
 
 
 ###############################################
@@ -251,29 +254,6 @@ def _clear_null_vals(dictionary):
     return OrderedDict((k, v) for k, v in dictionary.items() if v)
 
 
-def decode_response_url(bing_encoded_url):
-    """
-    THIS FUNCTION WILL PREVENT YOU FROM GETTING TAILORED RESULTS FROM BING.
-
-    :param bing_encoded_url: A response-url from bing -- str
-    :return: a decoded response-url from bing -- str
-    """
-    import urllib
-    new_url = bing_encoded_url[153:-15].lstrip('=')
-    ans = urllib.unquote(new_url).decode('utf8')
-    # if, for any reason, urllib.unquote() fails, try again manually with binascii:
-    if ans == bing_encoded_url[153:-15].lstrip('='):
-        import binascii
-        # yes it appears to be this easy.
-        new_url = bing_encoded_url[153:-15].lstrip('=')
-        new_new_url = new_url.replace('%3a', binascii.a2b_hex('3a'))
-        new_url = new_new_url.replace('%2f', binascii.a2b_hex('2f'))
-        new_new_url = new_url.replace('%3f', binascii.a2b_hex('3f'))
-        ans2 = new_new_url.replace('%3d', binascii.a2b_hex('3d'))
-        return ans2
-    else: return ans
-
-
 def validate_request_response(response):
     """
     Return nothing if valid response object returned.
@@ -283,11 +263,11 @@ def validate_request_response(response):
     """
     if not response.status_code == 200:
         if response.status_code == 429:
-            print('queries/second quota exceeded. this func will make 5 attempts to resend.')
+            log.warning('queries/second quota exceeded & retries used up.')
             return '429'
         elif response.status_code == 400:
             json = response.json()
-            print '400 error: Bad params\n\nBing is showing {} param(s) set to {}'.format(json['errors'][0]['parameter'], json['errors'][0]['value'])
+            log.error('400 error: Bad params\n\nBing is showing %s param(s) set to %s', json['errors'][0]['parameter'], json['errors'][0]['value'])
             raise ValueError()
         elif str(response.status_code) in list(local_static_constants._ERROR_CODES.keys()):
             raise AssertionError(local_static_constants._ERROR_CODES[str(response.status_code)])
@@ -0,0 +1,278 @@
+import cPickle
+import sqlite3
+from collections import OrderedDict
+from hashlib import sha1
+from threading import Lock
+from time import time
+from urlparse import parse_qsl, urlsplit, urlunsplit
+
+from requests.models import Response, urlencode
+from requests.structures import CaseInsensitiveDict
+
+# Headers which change what Bing sends back. mkt etc. already live in the URL.
+_KEYED_HEADERS = ('Accept-Language', 'X-Search-Location', 'X-Search-ClientIP')
+
+# DiskCache evicts down to this share of its limits at a time, so a full cache doesn't evict (& re-count
+# the table) on every set().
+_EVICT_TO = 0.9
+
+
+###############################################
+##                                           ##
+##            Cache-key building             ##
+##                                           ##
+###############################################
+def response_cache_key(predicted_url, headers):
+    """
+    Normalizes a predicted query URL + the result-shaping headers into one cache key.
+
+    Query params are sorted & scheme/host lower-cased, so the same query built from differently
+    ordered dicts lands on the same key. The subscription key is never part of it.
+    :param predicted_url: EX -- BingSearch._predict_url(bypass_setting_attrs=True)
+    :param headers: the header dict the request will be sent with.
+    :return str:
+    """
+    scheme, netloc, path, query, _ = urlsplit(predicted_url)
+    normalized_url = urlunsplit((scheme.lower(), netloc.lower(), path, urlencode(sorted(parse_qsl(query))), ''))
+    keyed_headers = ['{}={}'.format(name, headers[name]) for name in _KEYED_HEADERS if headers.get(name)]
+    return '|'.join([normalized_url] + keyed_headers)
+
+
+###############################################
+##                                           ##
+##          In-memory LRU backend            ##
+##                                           ##
+###############################################
+def _detach_response(response):
+    """
+    Copy of `response` w/ only what a cache hit needs. Leaves out .request, whose headers hold the subscription
+    key, plus .history, .raw & .connection, so none of them live as long as the cache does.
+    """
+    detached = Response()
+    detached.status_code = response.status_code
+    detached.headers = response.headers.copy()
+    detached.url = response.url
+    detached.encoding = response.encoding
+    detached.reason = response.reason
+    detached.elapsed = response.elapsed
+    detached._content = response.content
+    return detached
+
+
+class MemoryCache(object):
+    """
+    Thread-safe LRU cache of requests.Response objects w/ a time-to-live. What's kept is a copy w/o the
+    request that was sent, so the subscription key isn't held onto; the caller's own Response is untouched.
+
+    :param max_entries: most responses kept. Least-recently-used are evicted first.
+    :param max_bytes: most response-body bytes kept. None for no limit.
+    :param ttl: seconds a response stays fresh. None to never expire.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored, size, response = entry
+            if self.ttl is not None and time() - stored > self.ttl:
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            # re-insert to mark as most recently used.
+            self._entries[key] = entry
+            self.hits += 1
+            return response
+
+    def set(self, key, response):
+        response = _detach_response(response)
+        size = len(response.content or '')
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time(), size, response)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+        }
+
+
+###############################################
+##                                           ##
+##        On-disk (sqlite) LRU backend       ##
+##                                           ##
+###############################################
+def _freeze_response(response):
+    """Only what's needed to rebuild the Response. Leaves out .request, which holds the subscription key."""
+    return cPickle.dumps((response.status_code, dict(response.headers), response.url, response.encoding,
+                          response.reason, response.content), cPickle.HIGHEST_PROTOCOL)
+
+
+def _thaw_response(blob):
+    status_code, headers, url, encoding, reason, content = cPickle.loads(str(blob))
+    response = Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = encoding
+    response.reason = reason
+    response._content = content
+    return response
+
+
+class DiskCache(object):
+    """
+    Same interface as MemoryCache, but kept in a sqlite file so it survives restarts & can be
+    shared by processes on the same box.
+
+    Once it goes over max_entries/max_bytes, the least recently used entries are dropped until it's back
+    under 90% of them.
+
+    :param path: sqlite file to use. Created if missing.
+    :param max_entries, max_bytes, ttl: see MemoryCache.
+    """
+
+    def __init__(self, path, max_entries=100000, max_bytes=None, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS responses '
+                         '(key TEXT PRIMARY KEY, stored REAL, accessed REAL, size INTEGER, body BLOB)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        # running totals, so set() doesn't have to count the whole table. Only an estimate when other processes
+        # share the file, so they're re-counted before anything gets evicted.
+        self._entries, self._bytes = self._count()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _hash(key):
+        if isinstance(key, unicode):
+            key = key.encode('utf8')
+        return sha1(key).hexdigest()
+
+    def get(self, key):
+        hashed = DiskCache._hash(key)
+        now = time()
+        with self._lock:
+            row = self._db.execute('SELECT stored, body, size FROM responses WHERE key = ?', (hashed,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if self.ttl is not None and now - row[0] > self.ttl:
+                self._db.execute('DELETE FROM responses WHERE key = ?', (hashed,))
+                self._entries -= 1
+                self._bytes -= row[2]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, hashed))
+            self.hits += 1
+        return _thaw_response(row[1])
+
+    def set(self, key, response):
+        blob = _freeze_response(response)
+        now = time()
+        hashed = DiskCache._hash(key)
+        with self._lock:
+            replaced = self._db.execute('SELECT size FROM responses WHERE key = ?', (hashed,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                             (hashed, now, now, len(blob), sqlite3.Binary(blob)))
+            if replaced is None:
+                self._entries += 1
+            else:
+                self._bytes -= replaced[0]
+            self._bytes += len(blob)
+            if self._over(1.0):
+                self._evict()
+
+    def _count(self):
+        return self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+    def _over(self, share):
+        return (self._entries > self.max_entries * share or
+                (self.max_bytes is not None and self._bytes > self.max_bytes * share))
+
+    def _evict(self):
+        """Drops the least recently used entries until the cache is under _EVICT_TO of its limits."""
+        self._entries, self._bytes = self._count()
+        if not self._over(1.0):
+            return
+        doomed = []
+        for key, size in self._db.execute('SELECT key, size FROM responses ORDER BY accessed'):
+            if not self._entries or not self._over(_EVICT_TO):
+                break
+            doomed.append((key,))
+            self._entries -= 1
+            self._bytes -= size
+        self._db.execute('BEGIN')
+        self._db.executemany('DELETE FROM responses WHERE key = ?', doomed)
+        self._db.execute('COMMIT')
+        self.evictions += len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM responses')
+            self._entries, self._bytes = 0, 0
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        entries, total_bytes = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'entries': entries,
+            'bytes': total_bytes,
+        }
+
+    def close(self):
+        self._db.close()
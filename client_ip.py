@@ -0,0 +1,61 @@
+import os
+import socket
+from threading import Lock
+
+# put this in a header dict's 'X-Search-ClientIP' & it's filled in the first time a searcher is built, not at import.
+AUTO = 'auto'
+# set to an IP to skip discovery & use that, or to 'off' to never send X-Search-ClientIP.
+ENV_VAR = 'BINGAPIPY_CLIENT_IP'
+
+_lock = Lock()
+_discovered = {}
+
+
+###############################################
+##                                           ##
+##    Lazy, cached X-Search-ClientIP         ##
+##                                           ##
+###############################################
+def client_ip():
+    """
+    This box's IP for the X-Search-ClientIP header. Looked up once per process, then cached.
+
+    Checks $BINGAPIPY_CLIENT_IP first. Otherwise it's gethostbyname(gethostname()), which can be a blocking
+    DNS lookup; if that fails the header just gets left out.
+    :return: the IP as a str, or None.
+    """
+    try:
+        return _discovered['ip']
+    except KeyError:
+        pass
+    with _lock:
+        if 'ip' not in _discovered:
+            from_env = os.environ.get(ENV_VAR)
+            if from_env is not None:
+                _discovered['ip'] = None if from_env.lower() in ('', 'off', 'none') else from_env
+            else:
+                try:
+                    _discovered['ip'] = socket.gethostbyname(socket.gethostname())
+                except (socket.error, UnicodeError):
+                    _discovered['ip'] = None
+        return _discovered['ip']
+
+
+def resolve_client_ip(headers, header_name='X-Search-ClientIP'):
+    """
+    Swaps an AUTO X-Search-ClientIP for the real thing, or drops it if there's no IP to send.
+    :param headers: header dict. Changed in place & returned.
+    """
+    if headers.get(header_name) == AUTO:
+        ip = client_ip()
+        if ip is None:
+            del headers[header_name]
+        else:
+            headers[header_name] = ip
+    return headers
+
+
+def reset_client_ip():
+    """Forgets the cached IP, EX -- after changing $BINGAPIPY_CLIENT_IP or the network."""
+    with _lock:
+        _discovered.clear()
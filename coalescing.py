@@ -0,0 +1,98 @@
+import sys
+from threading import Event, Lock
+
+
+###############################################
+##                                           ##
+##    Sharing identical in-flight requests   ##
+##                                           ##
+###############################################
+class _Flight(object):
+    """One call in progress, & what it came back with."""
+
+    def __init__(self):
+        self.done = Event()
+        self.value = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight(object):
+    """
+    Makes concurrent identical calls share one execution: the first caller for a key runs it, & everyone
+    else asking for the same key while it's running waits for that result instead of running it again.
+    Nothing is kept once the call finishes (that's what caching.MemoryCache is for).
+
+    Give one to BingSearch(single_flight=...) & identical queries -- same endpoint, query, params &
+    result-shaping headers, whatever the subscription key -- sent at the same moment cost one request
+    between them. Share one across searchers (see shared_single_flight()) to coalesce across the process.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._flights = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """
+        Runs func() for `key`, or waits on the run already in flight for it.
+        :return: (what func() returned, True if that came from another caller's run).
+        :raises: whatever func() raised, in every caller waiting on it.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error[0], flight.error[1], flight.error[2]
+            return flight.value, True
+        try:
+            flight.value = func()
+        except BaseException:
+            flight.error = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+    @property
+    def saved_requests(self):
+        """Calls that didn't have to go out, i.e. quota units saved (more, if the shared call was retried)."""
+        return self.coalesced
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._flights)
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'saved_requests': self.saved_requests,
+            'coalesced_rate': float(self.coalesced) / (self.calls + self.coalesced) if self.coalesced else 0.0,
+            'in_flight': in_flight,
+        }
+
+    def __repr__(self):
+        return 'SingleFlight: {} calls, {} coalesced'.format(self.calls, self.coalesced)
+
+
+_shared = None
+_shared_lock = Lock()
+
+
+def shared_single_flight():
+    """The process-wide SingleFlight, created the first time it's asked for."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SingleFlight()
+        return _shared
@@ -0,0 +1,146 @@
+from array import array
+from itertools import chain
+
+from .url_decoding import decode_response_urls
+
+
+###############################################
+##                                           ##
+##      Column-per-field batches of results  ##
+##                                           ##
+###############################################
+class ResultBatch(object):
+    """
+    A batch of results stored column by column instead of one object per result.
+
+    Each column is kept as a list of chunks (one per page), so concatenating pages only concatenates
+    the chunk lists; no result is copied or re-wrapped. 'rank' chunks are array('l') buffers, which
+    numpy/Arrow can wrap w/o copying.
+
+    Columns -- url, url_decoded, name, snippet, display_url, date_crawled, rank.
+    News results fill snippet from 'description' & date_crawled from 'datePublished', & have no display_url.
+    """
+    COLUMNS = ('url', 'url_decoded', 'name', 'snippet', 'display_url', 'date_crawled', 'rank')
+
+    def __init__(self, chunks=None):
+        self._chunks = chunks if chunks is not None else dict((name, []) for name in ResultBatch.COLUMNS)
+
+    @classmethod
+    def from_json_entries(cls, json_entries, first_rank=0, urls_decoder=None):
+        """
+        Builds a one-chunk batch straight from a page's list of JSON entries, w/o making WebResults.
+        :param json_entries: EX -- json_response['webPages']['value']
+        :param first_rank: rank (overall position) of the first entry, i.e. the page's offset.
+        :param urls_decoder: callable turning a list of Bing redirect urls into the real ones.
+        """
+        urls = [entry.get('url') for entry in json_entries]
+        if urls_decoder is None:
+            urls_decoder = decode_response_urls
+        columns = {
+            'url': urls,
+            'url_decoded': urls_decoder(urls),
+            'name': [entry.get('name') for entry in json_entries],
+            'snippet': [entry.get('snippet', entry.get('description')) for entry in json_entries],
+            'display_url': [entry.get('displayUrl') for entry in json_entries],
+            'date_crawled': [entry.get('dateLastCrawled', entry.get('datePublished')) for entry in json_entries],
+            'rank': array('l', xrange(first_rank, first_rank + len(json_entries))),
+        }
+        return cls(dict((name, [column]) for name, column in columns.items()))
+
+    @classmethod
+    def concat(cls, batches):
+        """Joins batches end to end. Only chunk lists are joined; no result is copied."""
+        merged = cls()
+        for batch in batches:
+            merged.extend(batch)
+        return merged
+
+    def filtered(self, keep):
+        """
+        New batch holding only some of the results. Chunk boundaries are kept.
+        :param keep: one bool per result, in order. EX -- [dedup.add(url) for url in batch.column('url')]
+        """
+        chunks = dict((name, []) for name in ResultBatch.COLUMNS)
+        position = 0
+        for chunk_num, rank_chunk in enumerate(self._chunks['rank']):
+            flags = keep[position:position + len(rank_chunk)]
+            position += len(rank_chunk)
+            for name in ResultBatch.COLUMNS:
+                kept = [value for value, flag in zip(self._chunks[name][chunk_num], flags) if flag]
+                chunks[name].append(array('l', kept) if name == 'rank' else kept)
+        return ResultBatch(chunks)
+
+    def extend(self, other):
+        for name in ResultBatch.COLUMNS:
+            self._chunks[name].extend(other._chunks[name])
+        return self
+
+    ###############################################
+    ##                 access                    ##
+    ###############################################
+    def __len__(self):
+        return sum(len(chunk) for chunk in self._chunks['rank'])
+
+    def column(self, name):
+        """One column as a flat list."""
+        return list(chain.from_iterable(self._chunks[name]))
+
+    __getitem__ = column
+
+    def chunks(self, name):
+        """One column as its per-page chunks."""
+        return list(self._chunks[name])
+
+    def iter_rows(self):
+        """Yields one dict per result. Handy for debugging; defeats the point for anything big."""
+        for row in zip(*[self.column(name) for name in ResultBatch.COLUMNS]):
+            yield dict(zip(ResultBatch.COLUMNS, row))
+
+    ###############################################
+    ##        hand-off to numpy/Arrow/pandas     ##
+    ###############################################
+    def to_numpy(self):
+        """dict of column name --> numpy array. 'rank' chunks are wrapped w/o copying when there's only one."""
+        import numpy
+        arrays = {}
+        for name in ResultBatch.COLUMNS:
+            if name == 'rank':
+                rank_chunks = [numpy.frombuffer(chunk, dtype='i{}'.format(chunk.itemsize)) for chunk in self._chunks[name]]
+                if not rank_chunks:
+                    arrays[name] = numpy.zeros(0, dtype='i{}'.format(array('l').itemsize))
+                else:
+                    arrays[name] = rank_chunks[0] if len(rank_chunks) == 1 else numpy.concatenate(rank_chunks)
+            else:
+                arrays[name] = numpy.array(self.column(name), dtype=object)
+        return arrays
+
+    def to_arrow(self):
+        """pyarrow.Table w/ one chunk per page in every column. 'rank' chunks are wrapped w/o copying."""
+        import pyarrow
+        arrow_columns = []
+        for name in ResultBatch.COLUMNS:
+            if name == 'rank':
+                arrow_type = pyarrow.int64()
+                arrow_chunks = [_arrow_rank_chunk(pyarrow, chunk) for chunk in self._chunks[name]]
+            else:
+                arrow_type = pyarrow.string()
+                arrow_chunks = [pyarrow.array(chunk, type=arrow_type) for chunk in self._chunks[name]]
+            arrow_columns.append(pyarrow.chunked_array(arrow_chunks, type=arrow_type))
+        return pyarrow.Table.from_arrays(arrow_columns, names=list(ResultBatch.COLUMNS))
+
+    def to_pandas(self):
+        """pandas.DataFrame, built through Arrow when it's installed & from numpy arrays when it isn't."""
+        try:
+            return self.to_arrow().to_pandas()
+        except ImportError:
+            import pandas
+            return pandas.DataFrame(self.to_numpy(), columns=list(ResultBatch.COLUMNS))
+
+    def __repr__(self):
+        return 'ResultBatch: {} results in {} chunk(s)'.format(len(self), len(self._chunks['rank']))
+
+
+def _arrow_rank_chunk(pyarrow, chunk):
+    if chunk.itemsize == 8:
+        return pyarrow.Array.from_buffers(pyarrow.int64(), len(chunk), [None, pyarrow.py_buffer(chunk)])
+    return pyarrow.array(chunk, type=pyarrow.int64())
@@ -0,0 +1,71 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+###############################################
+##                                           ##
+##     Pooled, keep-alive HTTP sessions      ##
+##                                           ##
+###############################################
+class SessionPool(object):
+    """
+    Thin wrapper around a requests.Session whose HTTPAdapter keeps warm connections to Bing.
+
+    One SessionPool can (and should) be shared by any number of BingSearch/BingLite instances.
+    Every request made through it re-uses an idle keep-alive connection when one is available,
+    so only the first request to api.cognitive.microsoft.com pays for the TCP + TLS handshake.
+
+    :param pool_connections: number of per-host connection pools to keep around.
+    :param pool_maxsize: max number of connections kept open to any single host.
+    :param keep_alive: set to False to send 'Connection: close' & force a new connection per request.
+    :param pool_block: if True, callers wait for a free connection instead of opening an extra one past pool_maxsize.
+    :param timeout: default timeout (seconds, or a (connect, read) tuple) for every request.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=10, keep_alive=True, pool_block=False, timeout=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, params=params, headers=headers, **kwargs)
+
+    def connection_stats(self):
+        """
+        Counts the connections opened vs. re-used by this pool since it was created.
+
+        Numbers come from the underlying urllib3 host-pools, so hosts evicted from the pool
+        (more than pool_connections distinct hosts) drop out of the count.
+        :return dict: {'requests': int, 'opened': int, 'reused': int}
+        """
+        opened = 0
+        sent = 0
+        for host_key in list(self.adapter.poolmanager.pools.keys()):
+            host_pool = self.adapter.poolmanager.pools.get(host_key)
+            if host_pool is None:
+                continue
+            opened += host_pool.num_connections
+            sent += host_pool.num_requests
+        return {'requests': sent, 'opened': opened, 'reused': max(sent - opened, 0)}
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return 'SessionPool(pool_maxsize={}, keep_alive={}): {}'.format(self.pool_maxsize, self.keep_alive,
+                                                                      self.connection_stats())
@@ -0,0 +1,168 @@
+from hashlib import md5
+from math import ceil, log
+from struct import unpack
+from threading import Lock
+from urllib import urlencode
+from urlparse import parse_qsl, urlsplit
+
+from .url_decoding import decode_response_url
+
+# query params that only say where a click came from. Two links differing only in these are the same page.
+_TRACKING_PARAMS = frozenset(('gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid'))
+_DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+
+###############################################
+##                                           ##
+##          URL --> dedup key                ##
+##                                           ##
+###############################################
+def normalize_url(url):
+    """
+    Boils a result url down to what decides which page it is, so near-duplicates compare equal.
+
+    Bing redirects are decoded first. Then scheme, 'www.', default ports, fragments, trailing slashes &
+    tracking params (utm_*, gclid, ...) are dropped, the host is lower-cased & the query params are sorted.
+    EX -- 'https://WWW.Example.com:443/a/?utm_source=bing&b=2&a=1#top' --> 'example.com/a?a=1&b=2'
+    :param url: str or unicode.
+    :return str: utf8-encoded key.
+    """
+    url = decode_response_url(url)
+    if isinstance(url, unicode):
+        url = url.encode('utf8')
+    scheme, netloc, path, query, _ = urlsplit(url.strip())
+    netloc = netloc.lower()
+    default_port = _DEFAULT_PORTS.get(scheme.lower())
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    path = path.rstrip('/')
+    if query:
+        query = urlencode(sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+                                 if not k.startswith('utm_') and k not in _TRACKING_PARAMS))
+    return netloc + path + ('?' + query if query else '')
+
+
+###############################################
+##                                           ##
+##        Set & Bloom-filter backends        ##
+##                                           ##
+###############################################
+class BloomFilter(object):
+    """
+    Fixed-size, pure-python Bloom filter. Never forgets & never grows, but once past `capacity` it'll
+    start calling some new keys duplicates more often than `error_rate`.
+
+    :param capacity: number of keys it's sized for.
+    :param error_rate: chance a never-seen key is reported as seen, at capacity.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = int(ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.num_bits / float(capacity) * log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        # double hashing: two 64-bit halves of one md5 stand in for num_hashes independent hashes.
+        first, second = unpack('<QQ', md5(key).digest())
+        return [(first + i * second) % self.num_bits for i in xrange(self.num_hashes)]
+
+    def add(self, key):
+        """Adds `key`. Returns True if it wasn't (as far as the filter can tell) already in."""
+        is_new = False
+        bits = self._bits
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                is_new = True
+        return is_new
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+
+class _HashSet(object):
+    """Exact backend. Keeps an 8-byte digest per key rather than the whole url."""
+
+    def __init__(self):
+        self._digests = set()
+
+    def add(self, key):
+        digest = md5(key).digest()[:8]
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def __contains__(self, key):
+        return md5(key).digest()[:8] in self._digests
+
+    @property
+    def nbytes(self):
+        # ~ set slot + the 8-byte str object, per key.
+        return len(self._digests) * 70
+
+
+class DedupIndex(object):
+    """
+    Remembers every result url it's shown & drops the ones it's seen before, by their normalize_url() key.
+
+    Give one to BingSearch(dedup=...) & duplicates get dropped inside the paging pipeline, before any
+    WebResult is built. Share one across searchers (BatchSearch clones share theirs) to dedup across queries.
+
+    :param bloom_capacity: None for an exact (hash-set) index, which grows w/ every new url.
+                           A number switches to a fixed-size BloomFilter sized for that many urls.
+    :param error_rate: BloomFilter false-positive rate. Ignored for the exact index.
+    """
+
+    def __init__(self, bloom_capacity=None, error_rate=0.001):
+        self._seen = _HashSet() if bloom_capacity is None else BloomFilter(bloom_capacity, error_rate)
+        self._lock = Lock()
+        self.checked = 0
+        self.duplicates = 0
+
+    def add(self, url):
+        """Returns True if `url` is new, False if it's a duplicate."""
+        key = normalize_url(url)
+        with self._lock:
+            is_new = self._seen.add(key)
+            self.checked += 1
+            if not is_new:
+                self.duplicates += 1
+        return is_new
+
+    def __contains__(self, url):
+        return normalize_url(url) in self._seen
+
+    def filter_entries(self, json_entries, url_field='url'):
+        """
+        Drops JSON entries whose url has been seen. Entries w/o a url are kept.
+        :param json_entries: EX -- json_response['webPages']['value']
+        :return: list of the new entries, in their original order.
+        """
+        return [entry for entry in json_entries if not entry.get(url_field) or self.add(entry[url_field])]
+
+    @property
+    def duplicate_rate(self):
+        return float(self.duplicates) / self.checked if self.checked else 0.0
+
+    def stats(self):
+        return {
+            'backend': type(self._seen).__name__.strip('_'),
+            'checked': self.checked,
+            'unique': self.checked - self.duplicates,
+            'duplicates': self.duplicates,
+            'duplicate_rate': self.duplicate_rate,
+            'bytes': self._seen.nbytes,
+        }
+
+    def __repr__(self):
+        return 'DedupIndex: {} checked, {:.1%} duplicates'.format(self.checked, self.duplicate_rate)
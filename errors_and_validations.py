@@ -2,6 +2,10 @@ class JsonParsingError(Exception):
     pass
 
 
+class QuotaExceededError(Exception):
+    pass
+
+
 
 ###############################################
 ##                                           ##
@@ -0,0 +1,413 @@
+import logging
+import socket
+from bisect import bisect_left
+from threading import Lock, local
+from time import time
+
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from requests.packages.urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from requests.packages.urllib3.util.connection import allowed_gai_family
+
+from .logs import REQUEST_LOGGER
+
+log = logging.getLogger(__name__)
+# the request being worked on by this thread, so nested search_2_* calls & the connection classes below
+# can all write into the same record.
+_current = local()
+
+# upper bounds, in seconds & bytes. +Inf is implied.
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 32768, 65536, 131072, 262144, 524288, 1048576)
+
+
+###############################################
+##                                           ##
+##        One record per search_2_* call     ##
+##                                           ##
+###############################################
+class RequestRecord(object):
+    """
+    Where the time went for one search_2_* call. Seconds & bytes; None means it didn't happen or can't be told.
+
+    dns/connect/tls are only there when the request had to open a new connection; re-used keep-alive
+    connections skip them. ttfb is send --> response headers, minus any connection setup.
+    download is response headers --> last body byte. Timings add up across retries.
+    """
+    TIMINGS = ('dns', 'connect', 'tls', 'ttfb', 'download', 'decode', 'parse', 'total')
+
+    def __init__(self, query=None):
+        self.query = query
+        self.url = None
+        self.status = None
+        self.bytes = None
+        self.attempts = 0
+        self.cache_hit = False
+        # True when the body came from an identical request already in flight (see coalescing.SingleFlight).
+        self.coalesced = False
+        self.error = None
+        for timing in RequestRecord.TIMINGS:
+            setattr(self, timing, None)
+        self._setup_before_attempt = 0.0
+
+    def add(self, timing, seconds):
+        current = getattr(self, timing)
+        setattr(self, timing, seconds if current is None else current + seconds)
+
+    def _connection_setup(self):
+        return sum(getattr(self, timing) or 0.0 for timing in ('dns', 'connect', 'tls'))
+
+    def start_attempt(self):
+        self.attempts += 1
+        self._setup_before_attempt = self._connection_setup()
+
+    def note_response(self, response, seconds):
+        """
+        :param response: requests.Response just received.
+        :param seconds: wall time of the whole session.get(), body included.
+        """
+        self.url = response.url
+        self.status = response.status_code
+        # requests stops response.elapsed once the headers are in; the body is read after that.
+        until_headers = response.elapsed.total_seconds()
+        self.add('ttfb', max(until_headers - (self._connection_setup() - self._setup_before_attempt), 0.0))
+        self.add('download', max(seconds - until_headers, 0.0))
+
+    @property
+    def retries(self):
+        return max(self.attempts - 1, 0)
+
+    def as_dict(self):
+        record = dict((timing, getattr(self, timing)) for timing in RequestRecord.TIMINGS)
+        record.update({'query': self.query, 'url': self.url, 'status': self.status, 'bytes': self.bytes,
+                       'retries': self.retries, 'cache_hit': self.cache_hit, 'coalesced': self.coalesced,
+                       'error': self.error})
+        return record
+
+    def __repr__(self):
+        return 'RequestRecord: {}'.format(', '.join('{}={:.4f}'.format(timing, getattr(self, timing))
+                                                   for timing in RequestRecord.TIMINGS
+                                                   if getattr(self, timing) is not None))
+
+
+def current_record():
+    """The RequestRecord this thread is filling in, or None."""
+    return getattr(_current, 'record', None)
+
+
+class _RecordScope(object):
+    """Opened by the outermost search_2_* call. Nested calls join its record instead of starting their own."""
+
+    def __init__(self, instrumentation, query):
+        self.instrumentation = instrumentation
+        self.query = query
+        self.record = None
+        self.started = None
+
+    def __enter__(self):
+        record = current_record()
+        if record is not None:
+            return record
+        self.record = _current.record = RequestRecord(self.query)
+        self.started = time()
+        return self.record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.record is None:
+            return
+        self.record.total = time() - self.started
+        if exc_type is not None:
+            self.record.error = exc_type.__name__
+        _current.record = None
+        self.instrumentation.emit(self.record)
+
+
+class _NotInstrumented(object):
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NOT_INSTRUMENTED = _NotInstrumented()
+
+
+###############################################
+##                                           ##
+##      Connection-level timing (urllib3)    ##
+##                                           ##
+###############################################
+class _TimedConnectionMixin(object):
+    """
+    Splits a new connection into DNS & TCP connect, written into the thread's current record.
+    Connects the way urllib3 would: same address families, & every address the name resolved to is tried
+    in order until one answers.
+    """
+
+    def _new_conn(self):
+        record = current_record()
+        if record is None:
+            return super(_TimedConnectionMixin, self)._new_conn()
+        started = time()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.error:
+            # let urllib3 raise its usual error.
+            return super(_TimedConnectionMixin, self)._new_conn()
+        resolved = time()
+        record.add('dns', resolved - started)
+        # connect straight to the addresses just looked up, so DNS isn't paid for twice.
+        dns_host = self._dns_host
+        try:
+            for attempt, address in enumerate(addresses):
+                self._dns_host = address[4][0]
+                try:
+                    conn = super(_TimedConnectionMixin, self)._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError):
+                    if attempt == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+        record.add('connect', time() - resolved)
+        self._setup_seconds = time() - started
+        return conn
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        self._setup_seconds = 0.0
+        started = time()
+        super(TimedHTTPSConnection, self).connect()
+        record = current_record()
+        if record is not None:
+            # everything connect() did past opening the socket is the TLS handshake.
+            record.add('tls', max(time() - started - self._setup_seconds, 0.0))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def instrument_session(session_pool):
+    """
+    Swaps the connection classes of a SessionPool (or requests.Session) for ones that time DNS/connect/TLS.
+    Already-open connections are dropped.
+    """
+    session = getattr(session_pool, 'session', session_pool)
+    for adapter in set(session.adapters.values()):
+        if adapter.poolmanager.pool_classes_by_scheme.get('https') is _TimedHTTPSConnectionPool:
+            continue
+        adapter.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                      'https': _TimedHTTPSConnectionPool}
+        adapter.poolmanager.clear()
+    return session_pool
+
+
+###############################################
+##                                           ##
+##       Histograms & metric exporting       ##
+##                                           ##
+###############################################
+class Histogram(object):
+    """
+    Cumulative-bucket histogram, same shape as a Prometheus one.
+    :param buckets: sorted upper bounds. A +Inf bucket is always added.
+    """
+
+    def __init__(self, buckets=SECONDS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate of the q-th quantile (0-1), interpolated within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def cumulative(self):
+        """[(upper bound as str, cumulative count)], ending w/ '+Inf'."""
+        running = 0
+        bounds = [repr(float(bucket)) if isinstance(bucket, float) else str(bucket) for bucket in self.buckets]
+        cumulative = []
+        for bound, bucket_count in zip(bounds + ['+Inf'], self.counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return cumulative
+
+
+class Instrumentation(object):
+    """
+    Collects a RequestRecord for every search_2_* call made by the BingSearch instances it's handed to.
+
+    Records are folded into histograms (one per timing, plus response size) & passed to any hooks.
+    Share one across searchers to get one set of numbers.
+
+    :param hooks: callables, each called w/ every finished RequestRecord.
+    :param session: optional SessionPool to patch w/ instrument_session() so DNS/connect/TLS get timed too.
+    :param prefix: metric-name prefix for the exporters.
+    """
+
+    def __init__(self, hooks=None, session=None, prefix='bingapipy'):
+        self.hooks = list(hooks or [])
+        self.prefix = prefix
+        self._lock = Lock()
+        self.histograms = dict((timing, Histogram(SECONDS_BUCKETS)) for timing in RequestRecord.TIMINGS)
+        self.bytes = Histogram(BYTES_BUCKETS)
+        self.requests = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+        # hooks that raised. They're logged & counted, never let out into the search_2_* call.
+        self.hook_errors = 0
+        if session is not None:
+            instrument_session(session)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def request(self, query=None):
+        """Context manager yielding the RequestRecord for the current search_2_* call."""
+        return _RecordScope(self, query)
+
+    def emit(self, record):
+        with self._lock:
+            self.requests += 1
+            self.retries += record.retries
+            self.cache_hits += int(record.cache_hit)
+            self.coalesced += int(record.coalesced)
+            self.errors += int(record.error is not None)
+            for timing, histogram in self.histograms.items():
+                seconds = getattr(record, timing)
+                if seconds is not None:
+                    histogram.observe(seconds)
+            if record.bytes is not None:
+                self.bytes.observe(record.bytes)
+        for hook in self.hooks:
+            try:
+                hook(record)
+            except Exception:
+                # emit() runs on the way out of a search_2_* call; raising here would replace its own error.
+                with self._lock:
+                    self.hook_errors += 1
+                log.exception('instrumentation hook %r failed', hook)
+
+    def summary(self):
+        """{timing: {'count', 'mean', 'p50', 'p99'}} for every timing seen so far."""
+        with self._lock:
+            return dict((timing, {'count': h.count, 'mean': h.sum / h.count, 'p50': h.quantile(0.5),
+                                  'p99': h.quantile(0.99)})
+                        for timing, h in self.histograms.items() if h.count)
+
+    def stats(self):
+        return {'requests': self.requests, 'retries': self.retries, 'cache_hits': self.cache_hits,
+                'coalesced': self.coalesced, 'errors': self.errors, 'hook_errors': self.hook_errors}
+
+    def to_prometheus(self):
+        """Everything collected so far, in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            name = '{}_request_seconds'.format(self.prefix)
+            lines.append('# HELP {} Time spent per stage of a search_2_* call.'.format(name))
+            lines.append('# TYPE {} histogram'.format(name))
+            for timing in RequestRecord.TIMINGS:
+                histogram = self.histograms[timing]
+                for bound, cumulative_count in histogram.cumulative():
+                    lines.append('{}_bucket{{stage="{}",le="{}"}} {}'.format(name, timing, bound, cumulative_count))
+                lines.append('{}_sum{{stage="{}"}} {!r}'.format(name, timing, histogram.sum))
+                lines.append('{}_count{{stage="{}"}} {}'.format(name, timing, histogram.count))
+            name = '{}_response_bytes'.format(self.prefix)
+            lines.append('# HELP {} Response body size.'.format(name))
+            lines.append('# TYPE {} histogram'.format(name))
+            for bound, cumulative_count in self.bytes.cumulative():
+                lines.append('{}_bucket{{le="{}"}} {}'.format(name, bound, cumulative_count))
+            lines.append('{}_sum {!r}'.format(name, self.bytes.sum))
+            lines.append('{}_count {}'.format(name, self.bytes.count))
+            for counter, value in sorted(self.stats().items()):
+                name = '{}_{}_total'.format(self.prefix, counter)
+                lines.append('# TYPE {} counter'.format(name))
+                lines.append('{} {}'.format(name, value))
+        return '\n'.join(lines) + '\n'
+
+
+def statsd_lines(record, prefix='bingapipy'):
+    """One finished RequestRecord as StatsD lines: timings in ms, size as a histogram, counts as counters."""
+    lines = ['{}.request.{}:{:.3f}|ms'.format(prefix, timing, getattr(record, timing) * 1000)
+             for timing in RequestRecord.TIMINGS if getattr(record, timing) is not None]
+    if record.bytes is not None:
+        lines.append('{}.response.bytes:{}|h'.format(prefix, record.bytes))
+    lines.append('{}.requests:1|c'.format(prefix))
+    if record.retries:
+        lines.append('{}.retries:{}|c'.format(prefix, record.retries))
+    if record.cache_hit:
+        lines.append('{}.cache_hits:1|c'.format(prefix))
+    if record.coalesced:
+        lines.append('{}.coalesced:1|c'.format(prefix))
+    if record.error is not None:
+        lines.append('{}.errors:1|c'.format(prefix))
+    return lines
+
+
+class StatsdHook(object):
+    """
+    Instrumentation hook sending every record to a StatsD server over UDP. Send failures are counted, not raised.
+    EX -- Instrumentation(hooks=[StatsdHook('127.0.0.1', 8125)])
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='bingapipy'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.send_errors = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def __call__(self, record):
+        try:
+            self._socket.sendto('\n'.join(statsd_lines(record, self.prefix)), self.address)
+        except socket.error:
+            self.send_errors += 1
+
+
+class LogHook(object):
+    """
+    Instrumentation hook logging one structured line per record. The record's as_dict() rides along as
+    `extra={'request': ...}`, for JSON formatters & log shippers to pick up. Nothing gets built when the
+    logger wouldn't emit at `level`.
+    EX -- Instrumentation(hooks=[LogHook()])
+    :param logger: logger or logger name. Defaults to 'bingapipy.requests'.
+    :param level: level each record is logged at.
+    """
+
+    def __init__(self, logger=REQUEST_LOGGER, level=logging.DEBUG):
+        self.logger = logging.getLogger(logger) if isinstance(logger, basestring) else logger
+        self.level = level
+
+    def __call__(self, record):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        self.logger.log(self.level, '%s %s %.1fms', record.status, record.url, (record.total or 0.0) * 1000,
+                        extra={'request': record.as_dict()})
@@ -0,0 +1,97 @@
+import json
+
+# fastest first. Only the ones that import get used. orjson & pysimdjson have no python 2 builds, so they're
+# not on the list.
+BACKENDS = ('ujson', 'json')
+
+
+###############################################
+##                                           ##
+##         Swappable JSON backends           ##
+##                                           ##
+###############################################
+def _load_backend(name):
+    """Imports one backend. Returns its module, or None if it isn't installed."""
+    if name == 'json':
+        return json
+    try:
+        return __import__(name)
+    except ImportError:
+        return None
+
+
+def available_backends():
+    """Names of the backends importable here, fastest first."""
+    return [name for name in BACKENDS if _load_backend(name) is not None]
+
+
+class JsonDecoder(object):
+    """
+    Turns raw response bytes into JSON, w/ whichever backend is fastest on this box.
+
+    Two ways in:
+        .loads(data)           -- full decode into plain dicts & lists, same as requests.Response.json().
+        .extract(data, fields) -- only the listed fields of each result. The body is still decoded in full
+                                  (neither backend can skip parts of it); the rest is dropped right away,
+                                  so it can be freed before any results get packaged.
+
+    :param backend: one of BACKENDS. None picks the first one installed.
+    """
+
+    def __init__(self, backend=None):
+        names = BACKENDS if backend is None else (backend,)
+        for name in names:
+            module = _load_backend(name)
+            if module is not None:
+                break
+        else:
+            raise ImportError('JSON backend {} is not installed'.format(backend))
+        self.backend = name
+        self._module = module
+
+    def loads(self, data):
+        """Full decode. :param data: str/bytes body of a response."""
+        return self._module.loads(data)
+
+    def extract(self, data, fields=('url',)):
+        """
+        Pulls just the listed fields out of each result & drops everything else.
+        Works for web & news responses alike. It's no faster to decode than loads(); what it saves is
+        the packaging & memory downstream.
+
+        :param data: str/bytes body of a response.
+        :param fields: JSON field names to keep, EX -- ('url', 'name').
+        :return: a trimmed response shaped like a news response --
+                 {'_type': ..., 'totalEstimatedMatches': int or None, 'value': [{field: ...}, ...]}
+                 or None if the response holds no recognizable result list (let _parse_json have a go).
+        """
+        document = self._module.loads(data)
+        response_type = document.get('_type')
+        if response_type == 'SearchResponse':
+            if 'webPages' not in document:
+                # a web search w/ no 'webPages' means no results.
+                return {'_type': response_type, 'totalEstimatedMatches': None, 'value': []}
+            result_list = document['webPages']
+        elif 'value' in document:
+            result_list = document
+        else:
+            return None
+        return {
+            '_type': response_type,
+            'totalEstimatedMatches': result_list.get('totalEstimatedMatches'),
+            'value': [{field: entry.get(field) for field in fields} for entry in result_list['value']],
+        }
+
+    def __repr__(self):
+        return 'JsonDecoder: {}'.format(self.backend)
+
+
+_default_decoder = None
+
+
+def default_decoder():
+    """A shared JsonDecoder using the fastest backend installed."""
+    global _default_decoder
+    if _default_decoder is None:
+        _default_decoder = JsonDecoder()
+    return _default_decoder
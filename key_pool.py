@@ -0,0 +1,192 @@
+from threading import Lock
+from time import gmtime, sleep, strftime, time
+
+from .errors_and_validations import QuotaExceededError
+
+
+###############################################
+##                                           ##
+##        Per-key pacing & bookkeeping       ##
+##                                           ##
+###############################################
+class _KeyState(object):
+    """Everything ApiKeyPool tracks about one key. Only touched under the pool's lock."""
+
+    def __init__(self, key, qps=None, monthly_quota=None):
+        assert isinstance(key, str) and len(key) == 32, 'subscription keys are 32 characters'
+        self.key = key
+        self.qps = qps
+        self.monthly_quota = monthly_quota
+        self.interval = 1.0 / qps if qps else 0.0
+        # time this key's next request may go out (same GCRA bookkeeping as rate_limiting.RateLimiter).
+        self.next_free = 0.0
+        self.month = None
+        self.month_used = 0
+        # skipped until this time, after a 429/403.
+        self.cooling_until = 0.0
+        self.requests = 0
+        self.ok = 0
+        self.throttled = 0
+        self.forbidden = 0
+        self.errors = 0
+
+    def roll_month(self, month):
+        if self.month != month:
+            self.month, self.month_used = month, 0
+
+    @property
+    def exhausted(self):
+        return self.monthly_quota is not None and self.month_used >= self.monthly_quota
+
+    @property
+    def monthly_remaining(self):
+        if self.monthly_quota is None:
+            return None
+        return max(self.monthly_quota - self.month_used, 0)
+
+    @property
+    def remaining_share(self):
+        """Share of this month's quota still left. Keys w/o a monthly quota count as full."""
+        if self.monthly_quota is None:
+            return 1.0
+        return self.monthly_remaining / float(self.monthly_quota)
+
+    @property
+    def label(self):
+        # enough to tell keys apart in stats & logs w/o printing a whole subscription key.
+        return '{}...{}'.format(self.key[:4], self.key[-4:])
+
+
+###############################################
+##                                           ##
+##       Spreading load across keys          ##
+##                                           ##
+###############################################
+class ApiKeyPool(object):
+    """
+    Spreads requests over several subscription keys, by what each has left of its qps & monthly quota.
+
+    Each request takes the key whose next qps slot comes up soonest (ties go to the one w/ the most of
+    its month left, then the least used). A key answering 429 sits out `cooldown` seconds (longer if
+    Retry-After asks); one answering 403 (out of call volume, usually) sits out `forbidden_cooldown`.
+    Keys past their monthly quota are skipped until the month rolls over.
+
+    Give one to BingSearch(key_pool=...) & every request it sends -- paging, concurrent=True, retries,
+    AsyncBingSearch, BatchSearch copies -- picks its key here. Thread-safe. Monthly counts are per process.
+
+    :param keys: list of subscription keys, or a dict of key --> {'qps': ..., 'monthly_quota': ...} for
+                 keys on different tiers.
+    :param qps: queries-per-second limit for each key. None to not pace.
+    :param monthly_quota: queries-per-month limit for each key. None to skip monthly accounting.
+    :param cooldown: seconds a key is skipped after a 429.
+    :param forbidden_cooldown: seconds a key is skipped after a 403.
+    """
+
+    def __init__(self, keys, qps=None, monthly_quota=None, cooldown=1.0, forbidden_cooldown=300.0):
+        assert keys, 'ApiKeyPool needs at least one key'
+        if isinstance(keys, dict):
+            self._states = [_KeyState(key, limits.get('qps', qps), limits.get('monthly_quota', monthly_quota))
+                            for key, limits in sorted(keys.items())]
+        else:
+            self._states = [_KeyState(key, qps, monthly_quota) for key in keys]
+        self._by_key = dict((state.key, state) for state in self._states)
+        self.cooldown = cooldown
+        self.forbidden_cooldown = forbidden_cooldown
+        self._lock = Lock()
+        # wait-time accounting, across every key.
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+
+    @property
+    def keys(self):
+        return [state.key for state in self._states]
+
+    def _pick(self, now):
+        """(key state or None, seconds to wait). Reserves the key's slot when one is picked."""
+        month = strftime('%Y-%m', gmtime(now))
+        usable = []
+        for state in self._states:
+            state.roll_month(month)
+            if not state.exhausted:
+                usable.append(state)
+        if not usable:
+            raise QuotaExceededError('Every key in the pool has used up its monthly quota for {}'.format(month))
+        ready = [state for state in usable if state.cooling_until <= now]
+        if not ready:
+            # all cooling down. Wait for the first one back, then pick again.
+            return None, min(state.cooling_until for state in usable) - now
+        state = min(ready, key=lambda s: (max(s.next_free, now), -s.remaining_share, s.requests))
+        slot = max(state.next_free, now)
+        state.next_free = slot + state.interval
+        state.month_used += 1
+        state.requests += 1
+        return state, slot - now
+
+    def acquire(self):
+        """
+        Takes a key for one request, sleeping if every key's next slot is in the future or they're all cooling down.
+        :raises QuotaExceededError: when every key is past its monthly quota.
+        :return str: the key to send. Hand it back w/ release() once the response is in.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                state, wait = self._pick(time())
+                if state is not None:
+                    self.acquired += 1
+                    if waited + wait > 0:
+                        self.waited += 1
+                        self.total_wait += waited + wait
+            # sleep outside the lock. The slot's already reserved.
+            if wait > 0:
+                sleep(wait)
+                waited += wait
+            if state is not None:
+                return state.key
+
+    def release(self, key, status_code=None, retry_after=None):
+        """
+        Reports how a request sent w/ `key` went.
+        :param status_code: the response's HTTP status, or None if no response came back.
+        :param retry_after: seconds from the response's Retry-After header, if any.
+        """
+        with self._lock:
+            state = self._by_key[key]
+            if status_code == 429:
+                state.throttled += 1
+                state.cooling_until = max(state.cooling_until, time() + max(self.cooldown, retry_after or 0))
+            elif status_code == 403:
+                state.forbidden += 1
+                state.cooling_until = max(state.cooling_until, time() + max(self.forbidden_cooldown, retry_after or 0))
+            elif status_code is None or status_code >= 400:
+                state.errors += 1
+            else:
+                state.ok += 1
+
+    def stats(self):
+        now = time()
+        per_key = {}
+        for state in self._states:
+            per_key[state.label] = {
+                'requests': state.requests,
+                'ok': state.ok,
+                'throttled': state.throttled,
+                'forbidden': state.forbidden,
+                'errors': state.errors,
+                'month_used': state.month_used,
+                'monthly_remaining': state.monthly_remaining,
+                'cooling_for': max(state.cooling_until - now, 0.0),
+            }
+        return {
+            'acquired': self.acquired,
+            'waited': self.waited,
+            'total_wait': self.total_wait,
+            'keys': per_key,
+        }
+
+    def __len__(self):
+        return len(self._states)
+
+    def __repr__(self):
+        return 'ApiKeyPool: {} keys'.format(len(self._states))
@@ -0,0 +1,27 @@
+import logging
+
+# every module logs under the package's logger: bingapipy.bingapipy, bingapipy.bingapipy_lite...
+PACKAGE_LOGGER = __name__.rpartition('.')[0] or 'bingapipy'
+# where instrumentation.LogHook sends one structured record per request, by default.
+REQUEST_LOGGER = PACKAGE_LOGGER + '.requests'
+# the header holding the subscription key. Never logged as-is.
+KEY_HEADER = 'Ocp-Apim-Subscription-Key'
+
+package_log = logging.getLogger(PACKAGE_LOGGER)
+# a library doesn't pick levels or outputs for the app. This only keeps py2's "No handlers could be found"
+# warning away until the app configures logging.
+package_log.addHandler(logging.NullHandler())
+
+
+def redact_headers(headers):
+    """
+    Copy of `headers` that's safe to log: the subscription key is cut down to the label key_pool uses.
+    :param headers: header dict, EX -- BingSearch().headers
+    :return: same type as `headers`.
+    """
+    key = headers.get(KEY_HEADER)
+    if not key:
+        return headers
+    redacted = headers.copy()
+    redacted[KEY_HEADER] = '{}...{}'.format(key[:4], key[-4:])
+    return redacted
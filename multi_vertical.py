@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from time import time
+
+# what MultiVerticalSearch() fans out to unless told otherwise.
+DEFAULT_VERTICALS = ('web', 'news', 'images', 'videos')
+
+
+###############################################
+##                                           ##
+##       What came back from one vertical    ##
+##                                           ##
+###############################################
+class VerticalResult(object):
+    """
+    Outcome of one vertical in a fan-out.
+
+    VRi.endpoint: the endpoint it was sent to, EX -- 'images'.
+    VRi.results: whatever BingSearch.page() returned. None if the vertical failed.
+    VRi.error: the exception the vertical raised. None if it succeeded.
+    VRi.total_estimated_matches: Bing's estimate for this vertical, if it sent one.
+    VRi.requests: # of HTTP requests the vertical made.
+    VRi.elapsed: seconds from start to finish of this one vertical.
+    """
+
+    def __init__(self, endpoint, results=None, error=None, total_estimated_matches=None, requests=0, elapsed=0.0):
+        self.endpoint = endpoint
+        self.results = results
+        self.error = error
+        self.total_estimated_matches = total_estimated_matches
+        self.requests = requests
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return 'VerticalResult: {} ({} results)'.format(self.endpoint, len(self.results or []))
+        return 'VerticalResult: {} (FAILED: {!r})'.format(self.endpoint, self.error)
+
+
+###############################################
+##                                           ##
+##     One query, several verticals at once  ##
+##                                           ##
+###############################################
+class MultiVerticalSearch(object):
+    """
+    Sends one query to several endpoints -- web, news, images, videos... -- at the same time, & packages each
+    w/ its own result class: WebResult, NewsResult, ImageResult & VideoResult (or the Slim ones).
+
+    Every vertical runs on a BingSearch.for_query() copy of `searcher` pointed at its endpoint, so they share
+    its headers, SessionPool, RateLimiter, cache & the rest. search() returns once the slowest vertical is
+    done, not after all of them back to back. A vertical that raises is reported w/ VerticalResult.error
+    set; the others still come back.
+
+    :param searcher: a configured BingSearch. Its endpoint doesn't matter.
+    :param verticals: endpoint names (see static_constants.API_ENDPOINTS) to fan out to.
+    :param executor: a multiprocessing.pool.ThreadPool to run the verticals on. Defaults to one of its own,
+                     w/ a thread per vertical.
+    """
+
+    def __init__(self, searcher, verticals=DEFAULT_VERTICALS, executor=None):
+        for endpoint in verticals:
+            assert endpoint in searcher.api_endpoints, '{} is not a known endpoint'.format(endpoint)
+        self.searcher = searcher
+        self.verticals = tuple(verticals)
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPool(len(self.verticals))
+        self.searches = 0
+
+    def _run_one(self, endpoint, query, params, page_kwargs):
+        started = time()
+        searcher = None
+        try:
+            searcher = self.searcher.for_query(query, params, endpoint=endpoint)
+            results = searcher.page(**page_kwargs)
+            return VerticalResult(endpoint, results=results,
+                                  total_estimated_matches=searcher.total_estimated_matches or None,
+                                  requests=searcher.queries_run, elapsed=time() - started)
+        except Exception as err:
+            return VerticalResult(endpoint, error=err, requests=searcher.queries_run if searcher else 0,
+                                  elapsed=time() - started)
+
+    def search_async(self, query, count_or_range=50, return_type_function='json_packaged', params=None,
+                     verticals=None, **page_kwargs):
+        """
+        Starts every vertical & returns right away.
+        :return: OrderedDict of endpoint --> multiprocessing AsyncResult, whose .get() returns a VerticalResult.
+        """
+        page_kwargs.update(count_or_range=count_or_range, return_type_function=return_type_function)
+        self.searches += 1
+        return OrderedDict((endpoint, self.executor.apply_async(self._run_one, (endpoint, query, params, page_kwargs)))
+                           for endpoint in (verticals or self.verticals))
+
+    def search(self, query, count_or_range=50, return_type_function='json_packaged', params=None, verticals=None,
+               **page_kwargs):
+        """
+        Runs `query` on every vertical at once & waits for the slowest.
+
+        :param query: query string.
+        :param count_or_range, return_type_function: passed to BingSearch.page() for every vertical.
+        :param params: dict of URL params layered on top of the searcher's, for every vertical <OPTIONAL>
+        :param verticals: endpoints to use this time instead of self.verticals <OPTIONAL>
+        :param page_kwargs: anything else BingSearch.page() takes, EX -- concurrent=True.
+        :return: OrderedDict of endpoint --> VerticalResult, in the order the verticals were listed.
+        """
+        pending = self.search_async(query, count_or_range, return_type_function, params, verticals, **page_kwargs)
+        return OrderedDict((endpoint, async_result.get()) for endpoint, async_result in pending.items())
+
+    def close(self):
+        """Stops the thread pool, if it's this instance's own."""
+        if self._owns_executor:
+            self.executor.close()
+            self.executor.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return 'MultiVerticalSearch: {}'.format(', '.join(self.verticals))
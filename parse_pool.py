@@ -0,0 +1,143 @@
+from multiprocessing import Pool, cpu_count
+from multiprocessing.util import Finalize
+from threading import Lock
+
+from .bingapipy import SlimNewsResult, SlimWebResult
+from .columnar import ResultBatch
+from .json_decoding import JsonDecoder
+from .url_decoding import decode_response_urls
+
+OUTPUTS = ('columnar', 'slim')
+
+# each worker process decodes w/ its own JsonDecoder, made once by _init_worker().
+_worker_state = {}
+
+
+###############################################
+##                                           ##
+##        What runs inside the workers       ##
+##                                           ##
+###############################################
+def _init_worker(json_backend):
+    _worker_state['decoder'] = JsonDecoder(json_backend)
+
+
+def _entries_and_estimate(json_response):
+    """
+    (result entries, totalEstimatedMatches) for web & news responses, same as BingSearch._raw_entries().
+    None for any other shape, which the parent process falls back on parsing itself.
+    """
+    response_type = json_response.get('_type')
+    if response_type == 'SearchResponse':
+        if 'webPages' not in json_response:
+            return [], None
+        return json_response['webPages'].get('value', []), json_response['webPages'].get('totalEstimatedMatches')
+    if response_type == 'News':
+        return json_response.get('value', []), json_response.get('totalEstimatedMatches')
+    return None
+
+
+def _parse_page(content, output, first_rank, keep_json):
+    """
+    raw response body --> (results, # of results Bing sent, totalEstimatedMatches), or None if it's not a shape
+    handled here. Urls are decoded in here too, so the parent process never has to.
+    """
+    json_response = _worker_state['decoder'].loads(content)
+    found = _entries_and_estimate(json_response)
+    if found is None:
+        return None
+    json_entries, total_estimated_matches = found
+    if output == 'columnar':
+        results = ResultBatch.from_json_entries(json_entries, first_rank=first_rank)
+    else:
+        result_class = SlimNewsResult if json_response.get('_type') == 'News' else SlimWebResult
+        results = [result_class(single_json_entry, keep_json) for single_json_entry in json_entries]
+        for single_result, url_decoded in zip(results, decode_response_urls([r.url for r in results])):
+            single_result._url_decoded = url_decoded
+    return results, len(json_entries), total_estimated_matches
+
+
+###############################################
+##                                           ##
+##      Process pool for parsing pages       ##
+##                                           ##
+###############################################
+def _stop_pool(pool):
+    """Lets the workers finish what's queued, then stops them & the pool's handler threads."""
+    pool.close()
+    pool.join()
+
+
+class ParsePool(object):
+    """
+    Moves the CPU-bound half of a search -- JSON decoding, packaging results & decoding urls -- off the
+    GIL & onto worker processes. Threads doing the network I/O hand raw response bodies over & get
+    compact results back: a columnar.ResultBatch or a list of SlimWebResult/SlimNewsResult per page.
+
+    Give one to BingSearch(parse_pool=...) & the 'json_packaged' & 'columnar' page types go through it.
+    Pair it w/ concurrent=True (or AsyncBingSearch/BatchSearch) so there are several pages to parse at once.
+    Use it in a `with` block or close() it. One that's dropped w/o either is closed once it's garbage collected.
+
+    :param processes: number of worker processes. Defaults to one per core.
+    :param json_backend: json_decoding backend for the workers. None picks the fastest installed.
+    """
+
+    def __init__(self, processes=None, json_backend=None):
+        self.processes = processes or cpu_count()
+        self._pool = Pool(self.processes, initializer=_init_worker, initargs=(json_backend,))
+        # the pool's handler threads keep it alive, so it never gets collected on its own. This closes it once
+        # this instance is collected instead. Holds the pool, not self.
+        self._finalizer = Finalize(self, _stop_pool, args=(self._pool,))
+        self._lock = Lock()
+        self.pages = 0
+        self.results = 0
+        self.bytes_in = 0
+
+    def parse_async(self, content, output='slim', first_rank=0, keep_json=False):
+        """
+        Queues one response body for parsing.
+        :param content: raw response body (str).
+        :param output: 'columnar' for a ResultBatch, 'slim' for a list of Slim*Result objects w/ url_decoded filled in.
+        :param first_rank: the page's offset. Only used by 'columnar'.
+        :param keep_json: passed on to the Slim*Result classes.
+        :return: multiprocessing AsyncResult. Its .get() returns what parse() does.
+        """
+        assert output in OUTPUTS, 'output must be one of {}'.format(', '.join(OUTPUTS))
+        return self._pool.apply_async(_parse_page, (content, output, first_rank, keep_json))
+
+    def parse(self, content, output='slim', first_rank=0, keep_json=False):
+        """
+        Parses one response body on a worker & waits for it. Only the calling thread waits; others keep going.
+        :return: (results, # of results Bing sent, totalEstimatedMatches or None),
+                 or None if the response isn't a web or news page.
+        """
+        return self._count(content, self.parse_async(content, output, first_rank, keep_json).get())
+
+    def map(self, contents, output='slim', keep_json=False):
+        """parse() for a batch of (content, first_rank) pairs, spread across every worker. Keeps their order."""
+        pending = [(content, self.parse_async(content, output, first_rank, keep_json)) for content, first_rank in contents]
+        return [self._count(content, parsed.get()) for content, parsed in pending]
+
+    def _count(self, content, parsed):
+        with self._lock:
+            self.pages += 1
+            self.bytes_in += len(content)
+            if parsed is not None:
+                self.results += parsed[1]
+        return parsed
+
+    def close(self):
+        """Stops the workers. Safe to call more than once."""
+        self._finalizer()
+
+    def stats(self):
+        return {'processes': self.processes, 'pages': self.pages, 'results': self.results, 'bytes_in': self.bytes_in}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return 'ParsePool: {} processes, {} pages parsed'.format(self.processes, self.pages)
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from urllib import quote_plus
+
+from requests.models import urlencode
+
+from .bingapipy import BingSearch, QueryChecker, _clear_null_vals, default_user_params, static_constants
+from .client_ip import resolve_client_ip
+
+# the only params that change from one request to the next.
+_PER_REQUEST_PARAMS = ('q', 'offset', 'count')
+# searchers kept per template by search(), one per distinct set of kwargs.
+_MAX_PROTOTYPES = 16
+
+
+###############################################
+##                                           ##
+##     Precompiled endpoint+params+headers   ##
+##                                           ##
+###############################################
+class QueryTemplate(object):
+    """
+    Immutable, precompiled request setup: endpoint, cleaned params & headers, subscription key.
+    All the cleaning, key-injection & URL-encoding that BingSearch.reset() redoes on every query happens
+    once, here. After that a request URL is one string join: the pre-encoded prefix + q + offset + count.
+
+    Use .url() to build request URLs directly (the fast path), or .search(query) for a BingSearch w/o any of
+    reset()'s work.
+
+    :param api_key: 32-character subscription key.
+    :param endpoint: key of static_constants.API_ENDPOINTS. The news-category endpoints aren't supported.
+    :param params: URL params, like BingSearch's. 'q' is ignored; 'offset' & 'count' become the defaults.
+    :param headers: request headers, like BingSearch's.
+    :param api_endpoints: endpoint name --> URL. Defaults to Bing's.
+    :param validate_params: run QueryChecker over params & headers once, up front.
+    """
+    __slots__ = ('api_key', 'endpoint', 'api_endpoints', 'base_url', '_params', '_headers', '_static', '_offset',
+                 '_count', '_prefix', '_suffix', '_prototypes')
+
+    def __init__(self, api_key, endpoint='web', params=None, headers=None, api_endpoints=None, validate_params=False):
+        assert isinstance(api_key, str) and len(api_key) == 32
+        assert 'categories' not in endpoint, 'QueryTemplate does not support the category endpoints'
+        api_endpoints = api_endpoints if api_endpoints is not None else static_constants.API_ENDPOINTS
+        if params is None:
+            params = default_user_params.DEFAULT_URL_PARAMS
+        if headers is None:
+            headers = default_user_params.DEFAULT_HEADER_PARAMS
+        cleaned_params = _clear_null_vals(params)
+        cleaned_headers = resolve_client_ip(_clear_null_vals(headers))
+        cleaned_headers.pop('Ocp-Apim-Subscription-Key', None)
+        keyed_headers = OrderedDict([('Ocp-Apim-Subscription-Key', api_key)])
+        keyed_headers.update(cleaned_headers)
+        if validate_params:
+            QueryChecker.check_web_params(cleaned_params, keyed_headers)
+        set_attr = super(QueryTemplate, self).__setattr__
+        set_attr('api_key', api_key)
+        set_attr('endpoint', endpoint)
+        set_attr('api_endpoints', api_endpoints)
+        set_attr('base_url', api_endpoints[endpoint])
+        # kept as tuples so nobody can change them under a searcher that's using them.
+        set_attr('_params', tuple(cleaned_params.items()))
+        set_attr('_headers', tuple(keyed_headers.items()))
+        set_attr('_offset', str(cleaned_params.get('offset', '0')))
+        set_attr('_count', str(cleaned_params.get('count', '50')))
+        static_params = [(k, v) for k, v in cleaned_params.items() if k not in _PER_REQUEST_PARAMS]
+        set_attr('_static', tuple(static_params))
+        set_attr('_prefix', self.base_url + 'q=')
+        set_attr('_suffix', '&' + urlencode(static_params) if static_params else '')
+        # (kwarg name, id(value)) pairs --> BingSearch that search() copies. Holding the searcher holds its
+        # kwarg values too, so their ids can't be reused while they're cached.
+        set_attr('_prototypes', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError('QueryTemplate is immutable. Make a new one.')
+
+    ###############################################
+    ##                 per query                 ##
+    ###############################################
+    def url(self, query, offset=None, count=None):
+        """
+        The full request URL for one page of `query`.
+        :param query: str or unicode.
+        :param offset, count: default to the template's own params.
+        """
+        if isinstance(query, unicode):
+            query = query.encode('utf8')
+        return '{}{}{}&offset={}&count={}'.format(self._prefix, quote_plus(query), self._suffix,
+                                                  self._offset if offset is None else offset,
+                                                  self._count if count is None else count)
+
+    def covers(self, params):
+        """True if `params` are this template's, give or take q/offset/count, i.e. url() can stand in for them."""
+        if len(params) - sum(1 for name in _PER_REQUEST_PARAMS if name in params) != len(self._static):
+            return False
+        for name, value in self._static:
+            if params.get(name) != value:
+                return False
+        return True
+
+    def search(self, query, **kwargs):
+        """
+        A BingSearch for `query` built off this template: nothing is re-cleaned or re-encoded, & its requests
+        go out on url(). Takes any other BingSearch() kwarg, EX -- session=, cache=, verbose=.
+
+        The first call w/ a given set of kwargs (the same objects, not just equal ones) builds a BingSearch;
+        later calls hand back BingSearch.for_query() copies of it, so BingSearch.__init__ isn't paid per query.
+        """
+        kwargs.setdefault('verbose', False)
+        cache_key = tuple(sorted((name, id(value)) for name, value in kwargs.items()))
+        prototype = self._prototypes.get(cache_key)
+        if prototype is None:
+            if len(self._prototypes) >= _MAX_PROTOTYPES:
+                self._prototypes.clear()
+            prototype = self._prototypes[cache_key] = BingSearch(self.api_key, '', endpoint=self.endpoint,
+                                                                 api_endpoints=self.api_endpoints, template=self,
+                                                                 **kwargs)
+        # the prototype's params are never touched in place, so its copies can share them.
+        return prototype._clone(query)
+
+    @property
+    def params(self):
+        """Copy of the cleaned params."""
+        return OrderedDict(self._params)
+
+    @property
+    def headers(self):
+        """Copy of the cleaned headers, subscription key included."""
+        return OrderedDict(self._headers)
+
+    def __repr__(self):
+        return 'QueryTemplate: {}q=...{}'.format(self.base_url, self._suffix)
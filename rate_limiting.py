@@ -0,0 +1,155 @@
+import json
+import os
+from threading import Lock
+from time import gmtime, sleep, strftime, time
+
+from .errors_and_validations import QuotaExceededError
+
+# state_file records are rewritten in place at a fixed width. Truncating instead makes
+# ext4 & friends flush on close, which costs ~70ms per acquire().
+_STATE_RECORD_SIZE = 256
+
+
+###############################################
+##                                           ##
+##       Client-side request pacing          ##
+##                                           ##
+###############################################
+class RateLimiter(object):
+    """
+    Proactive limiter for a Bing subscription's queries-per-second & queries-per-month quotas.
+
+    Thread-safe, so one instance can pace every BingSearch/BingLite in a process (see shared_rate_limiter()).
+    Give it a state_file & it will also pace every *process* on the box pointing at the same file.
+
+    Pacing is a token bucket, tracked as the time the next token becomes free (a.k.a. GCRA), which is a
+    single float & cheap to keep in a file. Requests are spread to run at `headroom` * qps so the
+    subscription sits just under its limit instead of bouncing off 429s.
+
+    :param qps: the subscription tier's queries-per-second limit.
+    :param burst: how many requests may go out back-to-back after an idle period.
+    :param monthly_quota: the tier's queries-per-month limit. None to skip monthly accounting.
+    :param headroom: fraction of qps to actually use. 1.0 runs right at the limit.
+    :param state_file: path to a file used to share pacing & monthly usage between processes. POSIX only.
+    """
+
+    def __init__(self, qps, burst=1, monthly_quota=None, headroom=0.95, state_file=None):
+        assert qps > 0, 'qps must be positive'
+        assert 0 < headroom <= 1, 'headroom must be in (0, 1]'
+        self.qps = float(qps)
+        self.burst = burst
+        self.monthly_quota = monthly_quota
+        self.headroom = headroom
+        self.state_file = state_file
+        self._interval = 1.0 / (self.qps * headroom)
+        self._next_free = 0.0
+        self._month = None
+        self._month_used = 0
+        self._lock = Lock()
+        # wait-time accounting
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    ###############################################
+    ##        pacing & quota bookkeeping         ##
+    ###############################################
+    def _reserve(self, state, tokens, now):
+        """Updates `state` in place. Returns the seconds the caller must wait for its tokens."""
+        month = strftime('%Y-%m', gmtime(now))
+        if state['month'] != month:
+            state['month'], state['month_used'] = month, 0
+        if self.monthly_quota is not None and state['month_used'] + tokens > self.monthly_quota:
+            raise QuotaExceededError('Monthly quota of {} queries used up for {}'.format(self.monthly_quota, month))
+        state['month_used'] += tokens
+        next_free = max(state['next_free'], now)
+        wait = max(next_free - (self.burst - 1) * self._interval - now, 0.0)
+        state['next_free'] = next_free + tokens * self._interval
+        return wait
+
+    def _reserve_in_process(self, tokens, now):
+        state = {'next_free': self._next_free, 'month': self._month, 'month_used': self._month_used}
+        wait = self._reserve(state, tokens, now)
+        self._next_free, self._month, self._month_used = state['next_free'], state['month'], state['month_used']
+        return wait
+
+    def _reserve_in_file(self, tokens, now):
+        try:
+            import fcntl
+        except ImportError:
+            raise EnvironmentError('state_file sharing needs fcntl, which this platform does not have.')
+        fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, _STATE_RECORD_SIZE).strip()
+            state = json.loads(raw) if raw else {'next_free': 0.0, 'month': None, 'month_used': 0}
+            wait = self._reserve(state, tokens, now)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, json.dumps(state).ljust(_STATE_RECORD_SIZE))
+            self._month, self._month_used = state['month'], state['month_used']
+            return wait
+        finally:
+            os.close(fd)
+
+    def acquire(self, tokens=1):
+        """
+        Reserve `tokens` queries, sleeping until they can go out without breaking the qps limit.
+        :raises QuotaExceededError: if monthly_quota would be exceeded.
+        :return float: seconds spent waiting.
+        """
+        with self._lock:
+            now = time()
+            if self.state_file:
+                wait = self._reserve_in_file(tokens, now)
+            else:
+                wait = self._reserve_in_process(tokens, now)
+            self.acquired += tokens
+            if wait > 0:
+                self.waited += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+        # sleep outside the lock. Our slot is already reserved so waiters still go out in order.
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    @property
+    def monthly_remaining(self):
+        if self.monthly_quota is None:
+            return None
+        return max(self.monthly_quota - self._month_used, 0)
+
+    def stats(self):
+        return {
+            'acquired': self.acquired,
+            'waited': self.waited,
+            'total_wait': self.total_wait,
+            'mean_wait': self.total_wait / self.acquired if self.acquired else 0.0,
+            'max_wait': self.max_wait,
+            'month_used': self._month_used,
+            'monthly_remaining': self.monthly_remaining,
+        }
+
+    def __repr__(self):
+        return 'RateLimiter(qps={}, burst={}, monthly_quota={})'.format(self.qps, self.burst, self.monthly_quota)
+
+
+###############################################
+##                                           ##
+##     Process-wide registry of limiters     ##
+##                                           ##
+###############################################
+_shared_limiters = {}
+_shared_limiters_lock = Lock()
+
+
+def shared_rate_limiter(name='default', **kwargs):
+    """
+    Returns the process-wide RateLimiter registered under `name`, creating it from kwargs the first time.
+    Use one name per subscription key so every BingSearch/BingLite using that key is paced together.
+    """
+    with _shared_limiters_lock:
+        if name not in _shared_limiters:
+            _shared_limiters[name] = RateLimiter(**kwargs)
+        return _shared_limiters[name]
@@ -0,0 +1,148 @@
+import json
+import mmap
+import os
+from threading import Lock
+
+
+###############################################
+##                                           ##
+##    Append-only store of fetched pages     ##
+##                                           ##
+###############################################
+class ResultStore(object):
+    """
+    Compact, append-only store for raw JSON pages, for offline analysis & replay.
+
+    Two files live side by side:
+        <path>.pages -- every page's raw response body, back to back, exactly as Bing sent it.
+        <path>.index -- one JSON line per page: [key, byte offset into .pages, byte length].
+
+    Only the index is held in RAM. Pages are read through a read-only memory map, so walking millions of
+    stored results only ever keeps one page decoded at a time. Re-storing a key w/ new bytes appends a new
+    copy & the latest one wins; re-storing the bytes it already holds is skipped. One writer at a time,
+    please; any number of readers is fine.
+
+    :param path: file prefix for the .pages/.index pair. Created if missing.
+    :param readonly: open for reading only.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self.data_path = path + '.pages'
+        self.index_path = path + '.index'
+        self._lock = Lock()
+        self._index = {}
+        self._map = None
+        self._data_file = None
+        self._index_file = None
+        if not readonly:
+            self._data_file = open(self.data_path, 'ab')
+            self._index_file = open(self.index_path, 'ab')
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as index_file:
+                for line in index_file:
+                    if line.strip():
+                        key, offset, length = json.loads(line)
+                        self._index[key] = (offset, length)
+
+    @staticmethod
+    def page_key(query, params, endpoint='web'):
+        """
+        (endpoint, query, params, offset) --> one string key. Param order doesn't matter.
+        :param query: plaintext query string.
+        :param params: dict of URL params the page was requested w/.
+        :param endpoint: endpoint name the page came from, EX -- 'news'. Same query & params, different page.
+        """
+        offset = int(params.get('offset') or 0)
+        other_params = sorted((str(k), str(v)) for k, v in params.items() if k != 'offset' and v is not None)
+        return json.dumps([endpoint, query, other_params, offset])
+
+    ###############################################
+    ##                  writing                  ##
+    ###############################################
+    def append(self, key, payload):
+        """
+        Stores one page's raw response body (bytes) under `key`.
+        :return bool: False if `key` already held exactly these bytes & nothing was written.
+        """
+        assert not self.readonly, 'ResultStore opened readonly'
+        with self._lock:
+            if key in self._index:
+                offset, length = self._index[key]
+                if length == len(payload) and self._mapped(offset + length)[offset:offset + length] == payload:
+                    return False
+            self._data_file.seek(0, os.SEEK_END)
+            offset = self._data_file.tell()
+            self._data_file.write(payload)
+            self._data_file.flush()
+            self._index_file.write(json.dumps([key, offset, len(payload)]) + '\n')
+            self._index_file.flush()
+            self._index[key] = (offset, len(payload))
+        return True
+
+    ###############################################
+    ##                  reading                  ##
+    ###############################################
+    def _mapped(self, end):
+        """Returns a memory map covering at least `end` bytes, re-mapping if the file has grown since."""
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            with open(self.data_path, 'rb') as data_file:
+                self._map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def keys(self):
+        return self._index.keys()
+
+    def get_bytes(self, key):
+        """Raw page body for `key`. Raises KeyError if it was never stored."""
+        offset, length = self._index[key]
+        with self._lock:
+            return self._mapped(offset + length)[offset:offset + length]
+
+    def get_json(self, key):
+        return json.loads(self.get_bytes(key))
+
+    def iter_pages(self):
+        """Yields (key, json_dict) for every stored page, in the order they were written. One page decoded at a time."""
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][0]):
+            yield key, self.get_json(key)
+
+    def iter_results(self, packager=None):
+        """
+        Yields every stored result, one at a time.
+        :param packager: callable turning one JSON entry into an object, e.g. WebResult. None yields the raw dicts.
+        """
+        for _, page_json in self.iter_pages():
+            if page_json.get('_type') == 'SearchResponse':
+                entries = page_json.get('webPages', {}).get('value', [])
+            else:
+                entries = page_json.get('value', [])
+            for entry in entries:
+                yield packager(entry) if packager is not None else entry
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            for open_file in (self._data_file, self._index_file):
+                if open_file is not None:
+                    open_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return 'ResultStore: {} ({} pages)'.format(self.path, len(self._index))
@@ -0,0 +1,170 @@
+from email.utils import mktime_tz, parsedate_tz
+from random import uniform
+from threading import Lock
+from time import sleep, time
+
+import requests
+
+
+###############################################
+##                                           ##
+##     Cap on retries across all requests    ##
+##                                           ##
+###############################################
+class RetryBudget(object):
+    """
+    Limits retries to a fraction of the traffic going through it.
+
+    Every first attempt deposits `ratio` of a retry into the budget, & every retry withdraws one.
+    When the budget is empty, failures are returned to the caller instead of retried,
+    so a struggling API doesn't get hit w/ a pile of retries on top of the normal traffic.
+
+    :param ratio: retries allowed per request sent, e.g. 0.2 == at most 1 retry for every 5 requests.
+    :param min_retries: retries available up-front, before any traffic has built up the budget.
+    :param max_balance: most retries that can be banked up during quiet periods.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10, max_balance=50):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.max_balance = max(max_balance, min_retries)
+        self._balance = float(min_retries)
+        self._lock = Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self._balance + self.ratio, self.max_balance)
+
+    def withdraw(self):
+        with self._lock:
+            if self._balance >= 1:
+                self._balance -= 1
+                return True
+            return False
+
+    @property
+    def balance(self):
+        return self._balance
+
+
+###############################################
+##                                           ##
+##         Backoff & retry decisions         ##
+##                                           ##
+###############################################
+class RetryPolicy(object):
+    """
+    Decides whether, & how long to wait before, a failed request gets re-sent.
+
+    Retries 429s, 5xx responses & dropped/reset connections, w/ exponential backoff & full jitter.
+    A Retry-After header on the response is honoured (never waits less than it asks).
+    Share one policy between BingSearch/BingLite instances & they share its RetryBudget & stats.
+
+    :param max_retries: most retries for any single request.
+    :param base_delay: backoff for the first retry, in seconds. Doubles on each retry after.
+    :param max_delay: ceiling on the computed backoff (Retry-After can still ask for longer).
+    :param jitter: randomize each backoff between 0 & its ceiling so retries from many threads spread out.
+    :param budget: RetryBudget limiting retries across all requests. None for no limit.
+    :param retry_statuses: HTTP status codes worth retrying.
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    RETRY_EXCEPTIONS = (requests.ConnectionError,)
+
+    def __init__(self, max_retries=5, base_delay=0.5, max_delay=30.0, jitter=True, budget=None,
+                 retry_statuses=RETRY_STATUSES):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.budget = budget if budget is not None else RetryBudget()
+        self.retry_statuses = retry_statuses
+        self._lock = Lock()
+        self.requests = 0
+        self.retries = 0
+        self.retries_by_reason = {}
+        self.budget_exhausted = 0
+        self.gave_up = 0
+        self.total_backoff = 0.0
+
+    def backoff(self, attempt):
+        """Seconds to wait before retry number `attempt` (counting from 0)."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return uniform(0, ceiling) if self.jitter else ceiling
+
+    @staticmethod
+    def retry_after(response):
+        """Parses a Retry-After header (seconds or HTTP-date). Returns seconds, or None if absent/garbled."""
+        header = response.headers.get('Retry-After')
+        if not header:
+            return None
+        header = header.strip()
+        if header.isdigit():
+            return float(header)
+        parsed = parsedate_tz(header)
+        if parsed is None:
+            return None
+        return max(mktime_tz(parsed) - time(), 0.0)
+
+    def _may_retry(self, attempt):
+        if attempt >= self.max_retries:
+            with self._lock:
+                self.gave_up += 1
+            return False
+        if self.budget is not None and not self.budget.withdraw():
+            with self._lock:
+                self.budget_exhausted += 1
+                self.gave_up += 1
+            return False
+        return True
+
+    def _count_retry(self, reason, delay):
+        with self._lock:
+            self.retries += 1
+            self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+            self.total_backoff += delay
+
+    def execute(self, send):
+        """
+        Calls send() until it returns a response that doesn't need retrying, or retries run out.
+        :param send: zero-arg callable returning a requests.Response.
+        :return: the last requests.Response. It may still be a 429/5xx if retries ran out; the caller validates it.
+        :raises: the last connection error, if retries ran out on one.
+        """
+        with self._lock:
+            self.requests += 1
+        if self.budget is not None:
+            self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                response = send()
+            except self.RETRY_EXCEPTIONS:
+                if not self._may_retry(attempt):
+                    raise
+                reason = 'connection'
+                delay = self.backoff(attempt)
+            else:
+                if response.status_code not in self.retry_statuses or not self._may_retry(attempt):
+                    return response
+                reason = str(response.status_code)
+                delay = self.backoff(attempt)
+                server_delay = RetryPolicy.retry_after(response)
+                if server_delay is not None:
+                    delay = max(delay, server_delay)
+            self._count_retry(reason, delay)
+            attempt += 1
+            sleep(delay)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'retries_by_reason': dict(self.retries_by_reason),
+            'budget_exhausted': self.budget_exhausted,
+            'gave_up': self.gave_up,
+            'total_backoff': self.total_backoff,
+        }
+
+    def __repr__(self):
+        return 'RetryPolicy(max_retries={}, base_delay={}, max_delay={})'.format(self.max_retries, self.base_delay,
+                                                                               self.max_delay)
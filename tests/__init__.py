@@ -0,0 +1,5 @@
+"""
+Tests for bingapipy. They only talk to a local bing_simulator.BingSimulator, never to Bing.
+
+Run from the directory holding the bingapipy package:  python -m unittest discover -s bingapipy/tests -t .
+"""
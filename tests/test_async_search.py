@@ -0,0 +1,82 @@
+import unittest
+from multiprocessing.pool import ThreadPool
+from threading import Event
+
+from ..async_search import AsyncBingSearch, gather
+from ..bing_simulator import BingSimulator
+
+KEY = 'a' * 32
+BAD_KEY = 'b' * 32
+
+
+class AsyncBingSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # jitter so requests finish out of the order they went out in.
+        cls.bing = BingSimulator(jitter=0.05, key_statuses={BAD_KEY: 401})
+        cls.bing.start()
+        cls.executor = ThreadPool(8)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.close()
+        cls.executor.join()
+        cls.bing.stop()
+
+    def searcher(self, key=KEY):
+        return AsyncBingSearch(key, 'seattle', executor=self.executor, verbose=False,
+                               api_endpoints=self.bing.api_endpoints)
+
+    @staticmethod
+    def page_params(offset):
+        return {'offset': str(offset), 'count': '10'}
+
+    def test_returns_before_the_response_is_in(self):
+        pending = self.searcher().search_2_json()
+        self.assertEqual(pending.get(5)['_type'], 'SearchResponse')
+
+    def test_gather_keeps_submission_order(self):
+        searcher = self.searcher()
+        offsets = range(0, 200, 10)
+        pending = [searcher.search_2_packaged_json(params=self.page_params(offset)) for offset in offsets]
+        pages = gather(pending, timeout=10)
+        self.assertEqual(len(pages), len(offsets))
+        for offset, page in zip(offsets, pages):
+            self.assertEqual(len(page), 10)
+            self.assertIn('Example {} Corp'.format(offset), page[0].name)
+
+    def test_callback_gets_the_value(self):
+        called = Event()
+        handed_back = []
+
+        def callback(value):
+            handed_back.append(value)
+            called.set()
+
+        pending = self.searcher().search_2_packaged_json(params=self.page_params(30), callback=callback)
+        results = pending.get(5)
+        self.assertTrue(called.wait(5))
+        self.assertIs(handed_back[0], results)
+        self.assertIn('Example 30 Corp', results[0].name)
+
+    def test_page_runs_in_the_background(self):
+        links = self.searcher().page(120, 'links_plaintext').get(10)
+        self.assertEqual(len(links), 120)
+        self.assertEqual(len(set(links)), 120)
+
+    def test_errors_are_raised_by_get(self):
+        pending = self.searcher(BAD_KEY).search_2_json()
+        self.assertRaises(AssertionError, pending.get, 5)
+
+    def test_one_failure_leaves_the_others_alone(self):
+        good, bad = self.searcher(), self.searcher(BAD_KEY)
+        pending = [good.search_2_json(), bad.search_2_json(), good.search_2_json()]
+        self.assertEqual(pending[0].get(5)['_type'], 'SearchResponse')
+        self.assertRaises(AssertionError, pending[1].get, 5)
+        self.assertEqual(pending[2].get(5)['_type'], 'SearchResponse')
+        self.assertFalse(pending[1].successful())
+
+
+if __name__ == '__main__':
+    unittest.main()
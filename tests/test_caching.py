@@ -0,0 +1,37 @@
+import unittest
+
+from ..bing_simulator import BingSimulator
+from ..bingapipy import BingSearch
+from ..caching import MemoryCache
+
+KEY = 'c' * 32
+
+
+class MemoryCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bing = BingSimulator(latency=0, jitter=0)
+        cls.bing.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bing.stop()
+
+    def test_cached_responses_dont_hold_the_key(self):
+        cache = MemoryCache()
+        searcher = BingSearch(KEY, 'seattle', verbose=False, api_endpoints=self.bing.api_endpoints, cache=cache)
+        sent = searcher.search_2_response_obj()
+        self.assertEqual(sent.request.headers['Ocp-Apim-Subscription-Key'], KEY)
+        cached = searcher.search_2_response_obj()
+        self.assertIsNot(cached, sent)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertIsNone(cached.request)
+        self.assertEqual(cached.content, sent.content)
+        self.assertEqual(cached.json(), sent.json())
+        for value in vars(cached).values():
+            self.assertNotIn(KEY, repr(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
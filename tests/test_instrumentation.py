@@ -0,0 +1,44 @@
+import unittest
+
+from ..bing_simulator import BingSimulator
+from ..bingapipy import BingSearch
+from ..instrumentation import Instrumentation
+
+KEY = 'a' * 32
+BAD_KEY = 'b' * 32
+
+
+def broken_hook(record):
+    raise ValueError('hook blew up')
+
+
+class HookFailureTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bing = BingSimulator(latency=0, jitter=0, key_statuses={BAD_KEY: 401})
+        cls.bing.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bing.stop()
+
+    def searcher(self, key, instrumentation):
+        return BingSearch(key, 'seattle', verbose=False, api_endpoints=self.bing.api_endpoints,
+                          instrumentation=instrumentation)
+
+    def test_a_failing_hook_doesnt_fail_the_search(self):
+        instrumentation = Instrumentation(hooks=[broken_hook])
+        self.assertEqual(self.searcher(KEY, instrumentation).search_2_json()['_type'], 'SearchResponse')
+        self.assertEqual(instrumentation.stats()['hook_errors'], 1)
+
+    def test_a_failing_hook_doesnt_replace_the_request_error(self):
+        instrumentation = Instrumentation(hooks=[broken_hook])
+        # a 401 fails validate_request_response()'s assert.
+        self.assertRaises(AssertionError, self.searcher(BAD_KEY, instrumentation).search_2_json)
+        self.assertEqual(instrumentation.stats()['errors'], 1)
+        self.assertEqual(instrumentation.stats()['hook_errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from time import sleep
+
+from ..bing_simulator import BingSimulator
+from ..bingapipy import BingSearch
+from ..dedup import DedupIndex
+
+KEY = 'a' * 32
+
+
+class PagingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # jitter so pages fetched side by side land out of order. Bing 'runs out' partway through page 5.
+        cls.bing = BingSimulator(jitter=0.02, total_estimated_matches=220)
+        cls.bing.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bing.stop()
+
+    def searcher(self, **kwargs):
+        return BingSearch(KEY, 'seattle', verbose=False, api_endpoints=self.bing.api_endpoints, **kwargs)
+
+    def test_columnar_ranks_survive_dedup(self):
+        searcher = self.searcher(dedup=DedupIndex())
+        searcher.page([0, 50])
+        batch = searcher.page([25, 75], 'columnar')
+        ranks = list(batch.column('rank'))
+        self.assertEqual(ranks, range(50, 75))
+        self.assertIn('Example 50 Corp', batch.column('name')[0])
+        self.assertEqual(searcher.last_page_yield, 0.5)
+
+    def test_concurrent_paging_state_follows_page_order(self):
+        for _ in range(5):
+            searcher = self.searcher()
+            results = searcher.page(400, 'json_packaged', concurrent=True, max_workers=4)
+            self.assertEqual(len(results), 220)
+            self.assertEqual(searcher.last_page_size, 20)
+            self.assertEqual(searcher.last_page_estimate, 220)
+            self.assertEqual(searcher.queries_run, 5)
+            self.assertEqual(searcher.paging_report,
+                             {'planned': 8, 'sent': 5, 'saved': 3, 'stopped_because': 'past totalEstimatedMatches'})
+
+    def test_prefetch_leaves_each_page_its_own_state(self):
+        searcher = self.searcher()
+        sizes = []
+        for page_of_results in searcher.iter_pages(400, 'json_packaged', prefetch=True):
+            # long enough for the prefetch thread to land the next page.
+            sleep(0.05)
+            self.assertEqual(searcher.last_page_size, len(page_of_results))
+            sizes.append(len(page_of_results))
+        self.assertEqual(sizes, [50, 50, 50, 50, 20])
+        self.assertEqual(searcher.paging_report['stopped_because'], 'short page')
+
+
+if __name__ == '__main__':
+    unittest.main()
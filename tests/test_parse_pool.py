@@ -0,0 +1,35 @@
+import gc
+import json
+import unittest
+
+from ..bing_simulator import fake_web_payload
+from ..parse_pool import ParsePool
+
+
+class ParsePoolTest(unittest.TestCase):
+
+    def test_parses_a_web_page(self):
+        with ParsePool(1) as pool:
+            results, page_size, total_estimated_matches = pool.parse(json.dumps(fake_web_payload(10, 20)), 'columnar',
+                                                                     first_rank=20)
+        self.assertEqual(page_size, 10)
+        self.assertEqual(list(results.column('rank')), range(20, 30))
+
+    def test_close_is_idempotent(self):
+        pool = ParsePool(1)
+        pool.close()
+        pool.close()
+
+    def test_a_dropped_pool_stops_its_workers(self):
+        pool = ParsePool(1)
+        workers, process_pool = list(pool._pool._pool), pool._pool
+        del pool
+        gc.collect()
+        for worker in workers:
+            worker.join(5)
+            self.assertFalse(worker.is_alive())
+        self.assertFalse(process_pool._worker_handler.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from ..bing_simulator import BingSimulator
+from ..query_template import QueryTemplate
+
+KEY = 'a' * 32
+
+
+class QueryTemplateSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bing = BingSimulator(latency=0, jitter=0)
+        cls.bing.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bing.stop()
+
+    def template(self):
+        return QueryTemplate(KEY, api_endpoints=self.bing.api_endpoints)
+
+    def test_searchers_send_the_template_url(self):
+        searcher = self.template().search('seattle')
+        url, params = searcher._request_target(searcher._page_params(0, 10))
+        self.assertIsNone(params)
+        self.assertTrue(url.startswith(self.bing.api_endpoints['web'] + 'q=seattle'))
+
+    def test_paging_one_searcher_leaves_the_others_alone(self):
+        template = self.template()
+        first, second = template.search('seattle'), template.search('paris')
+        first.page((10, 30))
+        self.assertEqual(first.params['offset'], '10')
+        self.assertEqual(second.params['offset'], template.search('oslo').params['offset'])
+        self.assertNotEqual(second.params['offset'], '10')
+
+    def test_reset_drops_the_template(self):
+        searcher = self.template().search('seattle')
+        searcher.reset(new_endpoint='news', verbose=False)
+        self.assertIsNone(searcher.template)
+        url, _ = searcher._request_target(searcher._page_params(0, 10))
+        self.assertTrue(url.startswith(self.bing.api_endpoints['news']))
+        self.assertEqual(searcher.search_2_json()['_type'], 'News')
+
+
+if __name__ == '__main__':
+    unittest.main()
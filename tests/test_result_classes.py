@@ -0,0 +1,30 @@
+import pickle
+import unittest
+
+from ..bing_simulator import fake_image_entry, fake_news_entry, fake_video_entry, fake_web_entry
+from ..bingapipy import ImageResult, NewsResult, SlimNewsResult, SlimWebResult, VideoResult, WebResult
+
+
+class ResultClassesTest(unittest.TestCase):
+
+    def test_as_dict_matches_the_full_classes(self):
+        for slim_class, full_class, entry in ((SlimWebResult, WebResult, fake_web_entry(7)),
+                                              (SlimNewsResult, NewsResult, fake_news_entry(7))):
+            slim, full = slim_class(entry, keep_json=True).as_dict(), full_class(entry).as_dict()
+            self.assertEqual(slim['url_decoded'], full['url_decoded'])
+            for name, value in slim.items():
+                if name in full:
+                    self.assertEqual(value, full[name], name)
+
+    def test_slotted_results_round_trip_through_pickle(self):
+        for result_class, entry in ((SlimWebResult, fake_web_entry(3)), (SlimNewsResult, fake_news_entry(3)),
+                                    (ImageResult, fake_image_entry(3)), (VideoResult, fake_video_entry(3))):
+            for protocol in (0, pickle.HIGHEST_PROTOCOL):
+                single_result = result_class(entry)
+                copied = pickle.loads(pickle.dumps(single_result, protocol))
+                self.assertEqual(copied.as_dict(), single_result.as_dict())
+                self.assertFalse(hasattr(copied, '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import shutil
+import tempfile
+import unittest
+from os import path
+
+from ..bing_simulator import BingSimulator
+from ..bingapipy import BingSearch
+from ..result_store import ResultStore
+
+KEY = 'a' * 32
+
+
+class OfflineReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bing = BingSimulator(latency=0, jitter=0)
+        self.bing.start()
+        self.directory = tempfile.mkdtemp()
+        self.store_path = path.join(self.directory, 'seattle')
+        online = BingSearch(KEY, 'seattle', verbose=False, api_endpoints=self.bing.api_endpoints,
+                            result_store=ResultStore(self.store_path))
+        self.stored = online.search_2_json()
+        online.result_store.close()
+
+    def tearDown(self):
+        self.bing.stop()
+        shutil.rmtree(self.directory)
+
+    def offline_searcher(self, query='seattle'):
+        return BingSearch(KEY, query, verbose=False, api_endpoints=self.bing.api_endpoints,
+                          result_store=ResultStore(self.store_path, readonly=True), offline=True)
+
+    def test_stored_pages_come_back_w_o_a_request(self):
+        sent = self.bing.stats()['requests']
+        self.assertEqual(self.offline_searcher().search_2_json(), self.stored)
+        self.assertEqual(self.bing.stats()['requests'], sent)
+
+    def test_paths_needing_the_network_raise(self):
+        searcher = self.offline_searcher()
+        sent = self.bing.stats()['requests']
+        self.assertRaises(LookupError, searcher.search_2_response_obj)
+        self.assertRaises(LookupError, searcher.page, 10, 'full_response')
+        self.assertRaises(LookupError, searcher.search_2_json, return_html=True)
+        self.assertRaises(LookupError, self.offline_searcher('never stored').search_2_json)
+        self.assertEqual(self.bing.stats()['requests'], sent)
+
+
+if __name__ == '__main__':
+    unittest.main()
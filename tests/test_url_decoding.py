@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import random
+import unittest
+from urllib import quote
+
+from .. import url_decoding
+from ..url_decoding import decode_response_url, decode_response_urls
+
+REDIRECT = 'https://www.bing.com/cr?IG=5D1C4A1D&CID=0A1B2C3D&rd=1&h=abc&v=1&r={}&p=DevEx,5065.1'
+
+# characters the random targets are built from: url syntax, percent signs, plus signs & non-ASCII.
+_ALPHABET = u'abcXYZ019-._~/:?&=+#% \xe9\xfc東京\u2603'
+
+
+def redirect_to(target):
+    """The Bing redirect-url for `target`, percent-encoded the way Bing does it."""
+    return REDIRECT.format(quote(target.encode('utf8'), safe=''))
+
+
+def random_target(rng):
+    path = u''.join(rng.choice(_ALPHABET) for _ in xrange(rng.randint(0, 40)))
+    return u'http://www.example{}.com/{}'.format(rng.randint(0, 999), path)
+
+
+class DecodeResponseUrlTest(unittest.TestCase):
+
+    def setUp(self):
+        url_decoding._memo.clear()
+
+    def test_pulls_out_the_r_param(self):
+        self.assertEqual(decode_response_url(REDIRECT.format('http%3a%2f%2fexample.com%2fjobs%3fid%3d7')),
+                         u'http://example.com/jobs?id=7')
+
+    def test_r_as_the_first_param(self):
+        self.assertEqual(decode_response_url('https://www.bing.com/cr?r=http%3a%2f%2fexample.com%2f&p=x'),
+                         u'http://example.com/')
+
+    def test_no_r_param_comes_back_unchanged(self):
+        url = 'https://www.bing.com/cr?IG=5D1C4A1D&CID=0A1B2C3D&rd=1&p=DevEx,5065.1'
+        self.assertEqual(decode_response_url(url), url)
+
+    def test_empty_r_param_comes_back_unchanged(self):
+        url = REDIRECT.format('')
+        self.assertEqual(decode_response_url(url), url)
+
+    def test_non_redirects_come_back_unchanged(self):
+        for url in ('http://example.com/careers?r=http%3a%2f%2fother.com', 'https://www.example.com/', 'not a url'):
+            self.assertEqual(decode_response_url(url), url)
+
+    def test_look_alike_hosts_come_back_unchanged(self):
+        for host in ('https://bing.com.evil.com', 'https://notbing.com', 'https://www.bing.co',
+                     'https://www.bing.com@evil.com', 'ftp://www.bing.com'):
+            url = host + '/cr?IG=1&r=http%3a%2f%2fexample.com%2f'
+            self.assertEqual(decode_response_url(url), url)
+
+    def test_subdomains_of_bing_are_decoded(self):
+        url = 'http://cc.bing.com/cr?IG=1&r=http%3a%2f%2fexample.com%2f'
+        self.assertEqual(decode_response_url(url), u'http://example.com/')
+
+    def test_non_utf8_bytes_fall_back_on_latin_1(self):
+        self.assertEqual(decode_response_url(REDIRECT.format('http%3a%2f%2fexample.com%2fcaf%E9')),
+                         u'http://example.com/caf\xe9')
+
+    def test_fragments(self):
+        # an encoded '#' belongs to the target; a raw one ends the r= param.
+        self.assertEqual(decode_response_url(REDIRECT.format('http%3a%2f%2fexample.com%2fa%23top')),
+                         u'http://example.com/a#top')
+        self.assertEqual(decode_response_url('https://www.bing.com/cr?IG=1&r=http%3a%2f%2fexample.com%2fa#top'),
+                         u'http://example.com/a')
+
+    def test_unicode_input(self):
+        self.assertEqual(decode_response_url(u'https://www.bing.com/cr?IG=1&r=http%3a%2f%2fexample.com%2f\xe9&p=x'),
+                         u'http://example.com/\xe9')
+        self.assertEqual(decode_response_url(unicode(REDIRECT.format('http%3a%2f%2fexample.com%2fcaf%C3%A9'))),
+                         u'http://example.com/caf\xe9')
+
+    def test_empty_values_pass_through(self):
+        self.assertIsNone(decode_response_url(None))
+        self.assertEqual(decode_response_url(''), '')
+        self.assertEqual(decode_response_urls([None, '']), [None, ''])
+
+    def test_memoized_results_match_fresh_ones(self):
+        url = REDIRECT.format('http%3a%2f%2fexample.com%2f')
+        first = decode_response_url(url)
+        self.assertIn(url, url_decoding._memo)
+        self.assertEqual(decode_response_url(url), first)
+
+    def test_memo_stays_bounded(self):
+        limit, url_decoding._MEMO_MAX_ENTRIES = url_decoding._MEMO_MAX_ENTRIES, 10
+        try:
+            for i in xrange(25):
+                decode_response_url(REDIRECT.format('http%3a%2f%2fexample{}.com%2f'.format(i)))
+            decode_response_urls([REDIRECT.format('http%3a%2f%2fexample{}.com%2f'.format(i)) for i in xrange(25, 30)])
+            self.assertLessEqual(len(url_decoding._memo), 15)
+        finally:
+            url_decoding._MEMO_MAX_ENTRIES = limit
+
+
+class DecodingPropertiesTest(unittest.TestCase):
+    """Properties checked over randomly built targets. Seeded, so a failure always reproduces."""
+
+    def setUp(self):
+        url_decoding._memo.clear()
+        self.rng = random.Random(1234)
+
+    def test_round_trip(self):
+        for _ in xrange(2000):
+            target = random_target(self.rng)
+            self.assertEqual(decode_response_url(redirect_to(target)), target)
+
+    def test_round_trip_w_unicode_input(self):
+        for _ in xrange(500):
+            target = random_target(self.rng)
+            self.assertEqual(decode_response_url(unicode(redirect_to(target))), target)
+
+    def test_decoding_is_idempotent_for_targets(self):
+        # a decoded url isn't a Bing redirect, so decoding it again changes nothing.
+        for _ in xrange(500):
+            decoded = decode_response_url(redirect_to(random_target(self.rng)))
+            self.assertEqual(decode_response_url(decoded), decoded)
+
+    def test_batch_matches_single(self):
+        urls = []
+        for _ in xrange(1000):
+            kind = self.rng.randint(0, 3)
+            if kind == 0:
+                urls.append(redirect_to(random_target(self.rng)))
+            elif kind == 1:
+                urls.append(random_target(self.rng).encode('utf8'))
+            elif kind == 2:
+                urls.append(REDIRECT.format(''))
+            else:
+                # repeats, to go through the memo.
+                urls.append(self.rng.choice(urls) if urls else None)
+        singles = [decode_response_url(url) for url in urls]
+        url_decoding._memo.clear()
+        self.assertEqual(decode_response_urls(urls), singles)
+        # & again, now that everything's memoized.
+        self.assertEqual(decode_response_urls(urls), singles)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import re
+from urllib import unquote
+
+# Bing wraps every result link in a click-tracking redirect, EX --
+#   https://www.bing.com/cr?IG=...&CID=...&rd=1&h=...&v=1&r=http%3a%2f%2fexample.com%2f&p=DevEx,5065.1
+# The real target is the percent-encoded 'r' param. Anything after it ('&p=...') is Bing's.
+_BING_HOST = re.compile(r'https?://(?:[\w-]+\.)*bing\.com/', re.IGNORECASE)
+
+# decoded urls are memoized, since the same links come back page after page & query after query.
+_MEMO_MAX_ENTRIES = 50000
+_memo = {}
+
+
+###############################################
+##                                           ##
+##      Bing redirect-url --> real url       ##
+##                                           ##
+###############################################
+def _decode_one(bing_encoded_url):
+    # plain string searches; a regex over the whole url is slower than the old fixed-offset slicing.
+    start = bing_encoded_url.find('?r=') + 3
+    if start == 2:
+        start = bing_encoded_url.find('&r=') + 3
+    if start == 2 or not _BING_HOST.match(bing_encoded_url):
+        # not a Bing redirect. Nothing to decode.
+        return bing_encoded_url
+    end = len(bing_encoded_url)
+    for terminator in '&#':
+        found = bing_encoded_url.find(terminator, start)
+        if found != -1 and found < end:
+            end = found
+    target = bing_encoded_url[start:end]
+    if not target:
+        return bing_encoded_url
+    if isinstance(target, unicode):
+        target = target.encode('utf8')
+    target = unquote(target)
+    try:
+        return target.decode('utf8')
+    except UnicodeDecodeError:
+        # the target itself wasn't utf8. latin-1 at least keeps every byte.
+        return target.decode('latin-1')
+
+
+def decode_response_url(bing_encoded_url):
+    """
+    Pulls the real url out of a Bing redirect-url.
+
+    THIS FUNCTION WILL PREVENT YOU FROM GETTING TAILORED RESULTS FROM BING.
+
+    :param bing_encoded_url: A response-url from bing -- str
+    :return: a decoded response-url from bing -- unicode.
+             Urls which aren't Bing redirects (or have no 'r' param) come back unchanged; None stays None.
+    """
+    if not bing_encoded_url:
+        return bing_encoded_url
+    decoded = _memo.get(bing_encoded_url)
+    if decoded is None:
+        if len(_memo) >= _MEMO_MAX_ENTRIES:
+            _memo.clear()
+        decoded = _memo[bing_encoded_url] = _decode_one(bing_encoded_url)
+    return decoded
+
+
+def decode_response_urls(bing_encoded_urls):
+    """
+    decode_response_url() for a whole page (or a whole column) of urls in one go.
+    Repeats, within the batch or from earlier batches, are only decoded once.
+
+    :param bing_encoded_urls: iterable of response-urls from bing.
+    :return: list of decoded urls, in the same order.
+    """
+    memo = _memo
+    if len(memo) >= _MEMO_MAX_ENTRIES:
+        memo.clear()
+    decode_one = _decode_one
+    decoded_urls = []
+    append = decoded_urls.append
+    for url in bing_encoded_urls:
+        decoded = memo.get(url)
+        if decoded is None:
+            decoded = memo[url] = decode_one(url) if url else url
+        append(decoded)
+    return decoded_urls